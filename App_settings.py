@@ -23,6 +23,11 @@ class AppSettings:
         self.available_languages = ['en', 'cz']  # Populated from TranslationManager
         self.theme = 'dark'  # Default theme
         self.ui_scale = 'medium'  # Default UI scale (small, medium, large)
+        self.event_driven_inputs = False  # Compile buttons as edge interrupts instead of polling
+        self.delta_telemetry = False  # Reporter sends only changed values between full snapshots
+        self.binary_telemetry = False  # Reporter sends length-prefixed binary frames instead of JSON lines
+        self.rpi_agent = False  # Run programs through a resident agent on the Pi instead of a fresh python3
+        self.rpi_targets = ""  # Further Pi hosts (comma separated) that get the same program in parallel
     
     def to_dict(self):
         return {
@@ -35,7 +40,12 @@ class AppSettings:
             'ssh_key_path': self.ssh_key_path,
             'language': self.language,
             'theme': self.theme,
-            'ui_scale': self.ui_scale
+            'ui_scale': self.ui_scale,
+            'event_driven_inputs': self.event_driven_inputs,
+            'delta_telemetry': self.delta_telemetry,
+            'binary_telemetry': self.binary_telemetry,
+            'rpi_agent': self.rpi_agent,
+            'rpi_targets': self.rpi_targets
             #'available_languages': self.available_languages
         }
     
@@ -52,5 +62,10 @@ class AppSettings:
         s.language = data.get('language', 'en')
         s.theme = data.get('theme', 'dark')
         s.ui_scale = data.get('ui_scale', 'medium')
+        s.event_driven_inputs = data.get('event_driven_inputs', False)
+        s.delta_telemetry = data.get('delta_telemetry', False)
+        s.binary_telemetry = data.get('binary_telemetry', False)
+        s.rpi_agent = data.get('rpi_agent', False)
+        s.rpi_targets = data.get('rpi_targets', '')
         #s.available_languages = data.get('available_languages', ['en', 'cz'])
         return s
\ No newline at end of file
@@ -4,9 +4,14 @@ FileManager.py - Complete Save/Load System for Visual Programming Projects
 Handles serialization and deserialization of projects with proper separation
 of persistent data (JSON-safe) and runtime references (QWidget objects).
 """
-from Imports import (json, os, datetime, Path, get_Utils, ProjectData, logging)
+import json
+import os
+import logging
+from datetime import datetime
+from pathlib import Path
+from Project_Data import ProjectData
+import Utils
 
-Utils = get_Utils()
         
 class FileManager:
     """Manages project file operations with auto-save capabilities"""
@@ -354,6 +359,33 @@ class FileManager:
             logging.error(f"Error loading project: {e}")
             return False
     
+    @classmethod
+    def load_project_file(cls, filepath) -> bool:
+        """
+        Load a project from an explicit path into Utils.project_data only
+        
+        Unlike load_project this does not touch app settings and needs no
+        GUI, which makes it usable for headless compilation.
+        
+        Args:
+            filepath: Path to a .project file
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                project_dict = json.load(f)
+            cls._populate_utils_from_save(project_dict)
+            return True
+            
+        except json.JSONDecodeError as e:
+            logging.error(f"Invalid JSON file: {e}")
+            return False
+        except Exception as e:
+            logging.error(f"Error loading project: {e}")
+            return False
+    
     @classmethod
     def _populate_utils_from_save(cls, project_dict: dict):
         """
@@ -406,6 +438,11 @@ class FileManager:
         Utils.app_settings.language = settings_dict.get('language', 'en')
         Utils.app_settings.theme = settings_dict.get('theme', 'dark')
         Utils.app_settings.ui_scale = settings_dict.get('ui_scale', 'medium')
+        Utils.app_settings.event_driven_inputs = settings_dict.get('event_driven_inputs', False)
+        Utils.app_settings.delta_telemetry = settings_dict.get('delta_telemetry', False)
+        Utils.app_settings.binary_telemetry = settings_dict.get('binary_telemetry', False)
+        Utils.app_settings.rpi_agent = settings_dict.get('rpi_agent', False)
+        Utils.app_settings.rpi_targets = settings_dict.get('rpi_targets', '')
 
     # ========================================================================
     # UTILITY OPERATIONS
@@ -14,12 +14,13 @@ from Imports import (
     QPropertyAnimation, QEasingCurve, os, QThread, paramiko, QRegularExpression, QRegularExpressionValidator, time,
     QTimer, QMessageBox, QInputDialog, Qt, QPoint, ctypes, pyqtSignal, QCoreApplication, QSizePolicy,
     QAction, QGraphicsView, QGraphicsScene, QPointF, QRectF, QPixmap, QPainterPath, QEvent,
-    QStackedWidget, QSplitter, json, QScroller, QIntValidator, QPixmap, logging
+    QStackedWidget, QSplitter, json, QScroller, QIntValidator, QPixmap, logging, codecs, select, QProgressDialog
 )
 from Imports import (
     get_Spawn_Blocks, get_Device_Settings_Window,
     get_Path_Manager, get_Blocks_Window, get_Utils,
-    get_Code_Editor_Window, get_Commands
+    get_Code_Editor_Window, get_Commands, get_Telemetry, get_SSH_Pool,
+    get_RPi_Agent, get_Deployment_Window
 )
 Utils = get_Utils()
 
@@ -32,6 +33,11 @@ PathGraphicsItem = get_Path_Manager()[1]
 blocksWindow = get_Blocks_Window()
 RemoveBlockCommand = get_Commands()[1]
 RemovePathCommand = get_Commands()[3]
+TelemetryRecorder = get_Telemetry()[2]
+TelemetryIngestThread = get_Telemetry()[3]
+SSHConnectionPool = get_SSH_Pool()
+RPiAgent = get_RPi_Agent()
+DeploymentWindow = get_Deployment_Window()
 
 #MARK: - Threads for background tasks
 class PromptPolicy(paramiko.MissingHostKeyPolicy):
@@ -68,19 +74,27 @@ class RPiExecutionThread(QThread):
     status = pyqtSignal(str)  # Status messages
     execution_completed = pyqtSignal(bool)  # Success/failure status
     host_key_verification = pyqtSignal(str, str, str)  # Emitted when host key verification is needed
+
+    STOP_TIMEOUT = 3.0  # Seconds the old program gets to exit after SIGINT
+    KILL_TIMEOUT = 1.0  # Seconds to wait after escalating to SIGKILL
+    STOP_POLL_INTERVAL = 0.1  # Seconds between exit checks on the Pi
+    READ_WAIT = 0.1  # Longest select() wait between stop checks while a program runs
+    JOIN_TIMEOUT = 5.0  # Seconds stopped threads get, all together, to finish
     
     def __init__(self, ssh_config):
         """
         Initialize the execution thread.
         
         Args:
-            ssh_config: dict with keys: filepath, rpi_host, rpi_user, rpi_password
+            ssh_config: dict with keys: filepath, rpi_host, rpi_user, rpi_password, use_agent
         """
         super().__init__()
         self.ssh_config = ssh_config
         self.should_stop = False  # Flag to stop execution
-        self.ssh = None  # SSH connection reference
+        self.ssh = None  # Pooled SSH connection (ssh_pool.PooledConnection)
+        self.pool = SSHConnectionPool.get_instance()
         self.channel = None  # SSH channel reference
+        self.agent = None  # rpi_agent.RPiAgent the program runs in (agent mode only)
         self.stop_lock = threading.Lock()  # Thread-safe stop flag
 
         self.key_prompt_event = threading.Event()  # Event to wait for host key verification response
@@ -96,14 +110,22 @@ class RPiExecutionThread(QThread):
         with self.stop_lock:
             self.should_stop = True
         
-        # CRITICAL: Close SSH connection immediately to interrupt blocking operations
-        if self.ssh is not None:
+        # CRITICAL: Before the program runs, drop the connection to interrupt blocking setup;
+        # once it runs, closing its channel is enough and the connection stays pooled
+        if self.ssh is not None and self.channel is None and self.agent is None:
             try:
                 #logging.info("Closing SSH connection...")
-                self.ssh.close()
+                self.pool.interrupt(self.ssh)
             except Exception as e:
                 logging.error(f"Error closing SSH: {e}")
-        
+
+        # The agent and its connection outlive this thread: ask it to end the program
+        if self.agent is not None:
+            try:
+                self.agent.stop()
+            except Exception as e:
+                logging.error(f"Agent stop error: {e}")
+
         # Close channel if it exists
         if self.channel is not None:
             try:
@@ -112,6 +134,37 @@ class RPiExecutionThread(QThread):
             except Exception as e:
                 logging.error(f"Error closing channel: {e}")
     
+    @classmethod
+    def stop_all(cls, threads):
+        """
+        Stop several execution threads at once. Blocks for seconds, so it runs off the GUI thread.
+
+        The supervisor scripts run side by side. Then all threads share one
+        JOIN_TIMEOUT deadline, and any thread still running after it is terminated.
+        """
+        for thread in threads:
+            with thread.stop_lock:
+                thread.should_stop = True
+        killers = [threading.Thread(target=thread.kill_process, daemon=True) for thread in threads]
+        for killer in killers:
+            killer.start()
+        for killer in killers:
+            killer.join()
+        for thread in threads:
+            thread.stop()
+        for thread in cls.wait_all(threads, cls.JOIN_TIMEOUT):
+            #logging.info(f"Execution thread did not stop in time, terminating...")
+            thread.terminate()
+            thread.wait()
+
+    @staticmethod
+    def wait_all(threads, timeout):
+        """Wait for threads against one shared deadline and return those still running"""
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.wait(max(0, int((deadline - time.monotonic()) * 1000)))
+        return [thread for thread in threads if thread.isRunning()]
+
     def should_continue(self):
         """
         Thread-safe check if execution should continue.
@@ -130,34 +183,26 @@ class RPiExecutionThread(QThread):
                 self.status.emit("Execution cancelled before start")
                 return
             
-            # ===== STEP 2: Connect to RPi =====
+            # ===== STEP 2: Connect to RPi (reuses the pooled connection when it is still alive) =====
             self.status.emit("Connecting to RPi...")
             
             try:
-                ssh = paramiko.SSHClient()
-
                 ssh_dir = Utils.get_base_path() / "Config"
                 os.makedirs(ssh_dir, exist_ok=True)  # Ensure Config directory exists
 
                 known_hosts_path = ssh_dir / "known_hosts"
                 open(known_hosts_path, 'a').close()  # Ensure known_hosts file exists
 
-                ssh.load_system_host_keys(str(known_hosts_path))  # Load existing known hosts
-
-                custom_policy = PromptPolicy(self, str(known_hosts_path))
-                ssh.set_missing_host_key_policy(custom_policy) # Reject unknown hosts for security; you can change to AutoAddPolicy if you want to allow new hosts
+                custom_policy = PromptPolicy(self, str(known_hosts_path)) # Reject unknown hosts for security; you can change to AutoAddPolicy if you want to allow new hosts
 
-                self.ssh = ssh  # Store reference for cleanup
-                
-                # Set timeout for connection attempt
-                ssh.connect(
+                ssh = self.pool.acquire(
                     self.ssh_config['rpi_host'],
-                    username=self.ssh_config['rpi_user'],
-                    password=self.ssh_config['rpi_password'],
-                    timeout=10,  # Connection timeout
-                    allow_agent=False,
-                    look_for_keys=False
+                    self.ssh_config['rpi_user'],
+                    self.ssh_config['rpi_password'],
+                    known_hosts_path,
+                    custom_policy
                 )
+                self.ssh = ssh  # Store reference for cleanup
             except paramiko.ssh_exception.SSHException as e:
                 self.error.emit(f"SSH error: {str(e)}")
                 self.execution_completed.emit(False)
@@ -169,66 +214,75 @@ class RPiExecutionThread(QThread):
             
             # ===== STEP 3: Check if stop was called during connection =====
             if not self.should_continue():
-                ssh.close()
                 self.status.emit("Execution cancelled during connection")
                 return
 
             self.status.emit("Connected to RPi")
+
+            if self.ssh_config.get('use_agent'):
+                self.run_with_agent(ssh)
+                return
+            if ssh.agent is not None:
+                ssh.agent.close()  # Agent mode was switched off; its program stops with it
+                ssh.agent = None
             
             # ===== STEP 4: Upload file via SFTP =====
             try:
                 self.status.emit("Uploading File.py...")
-                sftp = ssh.open_sftp()
-                
-                # Get home directory
-                stdin, stdout, stderr = ssh.exec_command("echo $HOME")
-                home_dir = stdout.read().decode().strip()
-                if not home_dir:
-                    home_dir = f"/home/{self.ssh_config['rpi_user']}"
+                sftp = ssh.get_sftp()
                 
-                remote_path = f"{home_dir}/File.py"
+                # Home directory is looked up once per connection
+                remote_path = f"{ssh.home_dir()}/File.py"
+                hash_path = f"{remote_path}.sha256"  # Digest of the uploaded File.py
                 
                 # ===== STEP 5: Check if stop was called before upload =====
                 if not self.should_continue():
-                    sftp.close()
-                    ssh.close()
                     self.status.emit("Execution cancelled before upload")
                     return
                 
-                # Upload file
-                sftp.put(self.ssh_config['filepath'], remote_path)
-                sftp.close()
-                
-                self.status.emit(f"Uploaded to {remote_path}")
+                # Upload file unless the Pi already has this exact version
+                local_hash = Utils.file_digest(self.ssh_config['filepath'])
+                try:
+                    sftp.stat(remote_path)  # The digest only counts while File.py itself is there
+                    with sftp.open(hash_path, 'r') as f:
+                        remote_hash = f.read().decode().strip()
+                except IOError:
+                    remote_hash = None
+                if remote_hash == local_hash:
+                    self.status.emit(f"{remote_path} unchanged, upload skipped")
+                else:
+                    try:
+                        sftp.remove(hash_path)  # An interrupted upload must not look current
+                    except IOError:
+                        pass
+                    sftp.put(self.ssh_config['filepath'], remote_path)
+                    with sftp.open(hash_path, 'w') as f:
+                        f.write(local_hash)
+                    self.status.emit(f"Uploaded to {remote_path}")
             
             except Exception as e:
                 self.error.emit(f"Failed to upload file: {str(e)}")
                 self.execution_completed.emit(False)
-                ssh.close()
+                self.pool.discard(ssh)
+                self.ssh = None
                 return
             
             # ===== STEP 6: Check if stop was called before execution =====
             if not self.should_continue():
-                ssh.close()
                 self.status.emit("Execution cancelled before code execution")
                 return
             
             # ===== STEP 7: Execute code on RPi =====
             self.status.emit("Killing old processes...")
 
-            self.kill_process()
+            # Returns as soon as the old program has exited and its pins are released
+            self.kill_process(self.get_configured_pins() or [17])
             # Check if stop was called while killing
             if not self.should_continue():
-                ssh.close()
                 self.status.emit("Execution stopped by user")
                 self.execution_completed.emit(False)
                 return
 
-            self.reset_gpio_remotely()
-            
-            # Give the old process time to die
-            time.sleep(2.0)
-
             self.status.emit("Executing code...")
             
             
@@ -241,48 +295,42 @@ class RPiExecutionThread(QThread):
                 
                 # Store channel for potential interruption
                 self.channel = stdout.channel
+                # Characters split across two reads are completed on the next one
+                output_decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
                 
-                # ===== CRITICAL: Non-blocking read with stop checks =====
-                # Wait for command completion while checking stop flag
+                # ===== CRITICAL: Event-driven read with stop checks =====
+                # select() wakes as soon as data arrives; the timeout only bounds how long a stop waits
                 
                 while not stdout.channel.exit_status_ready():
-                    # Check if stop was called (every 100ms)
+                    # Check if stop was called (at least every READ_WAIT seconds)
                     if not self.should_continue():
                         # Close channel to interrupt remote process
                         try:
                             stdout.channel.close()
-                            ssh.close()
                         except:
                             pass
                         return
                     
-                    # Check timeout
-                    if self.channel.recv_ready():
-                        # Read available data (byte by byte or chunks, but readline is easier if PTY)
-                        # Since recv_ready is true, we can read.
-                        # CAUTION: readline() might block if a line isn't complete. 
-                        # Ideally, use a non-blocking read pattern:
-                        try:
-                            line = self.channel.recv(4096).decode('utf-8')
-                            if line:
-                                # Check if it contains your report tag
-                                if '__REPORT__' in line:
-                                    # Extract the JSON part and emit it specifically if needed
-                                    # Or just emit raw output for now
-                                    self.output.emit(line)
-                                else:
-                                    self.output.emit(line)
-                        except Exception as e:
-                            logging.error(f"Read error: {e}")
-                    # Sleep briefly to avoid busy-waiting
-                    time.sleep(0.1)
+                    try:
+                        readable, _, _ = select.select([self.channel], [], [], self.READ_WAIT)
+                        if readable:
+                            data = self.drain_channel(self.channel)
+                            if not data and self.channel.eof_received:
+                                # At EOF select() stays readable: wait for the exit status instead of spinning
+                                self.channel.status_event.wait(self.READ_WAIT)
+                                continue
+                            # One batch per wakeup; lines and report frames are split by the telemetry ingest
+                            text = output_decoder.decode(data)
+                            if text:
+                                self.output.emit(text)
+                    except Exception as e:
+                        logging.error(f"Read error: {e}")
                 
                 # Get exit code
                 exit_code = stdout.channel.recv_exit_status()
                 
                 # ===== STEP 8: Check if stop was called during execution =====
                 if not self.should_continue():
-                    ssh.close()
                     self.status.emit("Execution cancelled after completion")
                     return
                 
@@ -303,8 +351,7 @@ class RPiExecutionThread(QThread):
                 except:
                     pass
                 
-                # Close SSH connection
-                ssh.close()
+                self.channel = None
                 
                 # ===== STEP 9: Handle results =====
                 if exit_code == 0:
@@ -323,7 +370,8 @@ class RPiExecutionThread(QThread):
                     self.error.emit(f"Execution error: {str(e)}")
                     self.execution_completed.emit(False)
                 try:
-                    ssh.close()
+                    self.pool.discard(ssh)
+                    self.ssh = None
                 except:
                     pass
         
@@ -335,103 +383,126 @@ class RPiExecutionThread(QThread):
         finally:
             if self.ssh is not None:
                 try:
-                    self.ssh.close()
+                    self.pool.release(self.ssh)  # Kept alive for the next run
                 except:
                     pass
 
-    def kill_process(self):
+    @staticmethod
+    def drain_channel(channel):
+        """Everything the channel has buffered right now, without blocking"""
+        chunks = []
+        while channel.recv_ready():
+            chunks.append(channel.recv(65536))
+        return b"".join(chunks)
+
+    def run_with_agent(self, ssh):
         """
-        Gracefully terminate old Python processes with proper delays.
+        Hot-swap the program into the resident agent on the Pi (started on first use)
+        and forward its output until the program exits or the thread is stopped.
         """
         try:
-            #logging.info("Terminating old processes...")
-            
-            # Step 1: Find the process ID (PID) first
-            find_pid_cmd = "pgrep -f 'python3.*File.py'"
-            stdin, stdout, stderr = self.ssh.exec_command(find_pid_cmd, timeout=3)
-            pids = stdout.read().decode().strip().split('\n')
-            pids = [p for p in pids if p]  # Filter empty strings
-            
-            if not pids:
-                #logging.info("No processes to terminate")
-                return
-            
-            #logging.info(f"Found {len(pids)} process(es): {pids}")
-            
-            # Step 2: Send SIGTERM to each process
-            for pid in pids:
-                kill_cmd = f"kill -INT {pid} 2>/dev/null || true"
-                self.ssh.exec_command(kill_cmd, timeout=2)
-            
-            #logging.info("SIGTERM sent, waiting for graceful shutdown...")
-            time.sleep(3.0)  # INCREASED: Give more time for cleanup
-            
-            # Step 3: Check if processes still running
-            stdin, stdout, stderr = self.ssh.exec_command(find_pid_cmd, timeout=3)
-            remaining = stdout.read().decode().strip().split('\n')
-            remaining = [p for p in remaining if p]
-            
-            if remaining:
-                logging.warning(f"{len(remaining)} process(es) still running")
-                #logging.info("Escalating to SIGKILL...")
-                
-                for pid in remaining:
-                    kill_cmd = f"kill -9 {pid} 2>/dev/null || true"
-                    self.ssh.exec_command(kill_cmd, timeout=2)
-                
-                time.sleep(1.0)
-                #logging.info("GPIO cleanup may not have completed. Pin state may be dirty.")
-            
-            # Final check to ensure port/file descriptors are released
-            time.sleep(0.5)
-            #logging.info("Process termination logic complete")
+            agent = ssh.agent
+            if agent is None or not agent.alive():
+                self.status.emit("Starting agent...")
+                # A program started without the agent may still hold the pins
+                self.kill_process(self.get_configured_pins() or [17])
+                agent = RPiAgent(ssh)
+                agent.start()
+                ssh.agent = agent
+            with open(self.ssh_config['filepath'], 'rb') as f:
+                source = f.read()
+            self.agent = agent
+            self.status.emit("Executing code...")
+            agent.run(source)
         except Exception as e:
-            logging.error(f"Process termination error: {e}")
-
+            if self.should_continue():  # A stop closes the connection under a starting agent
+                self.error.emit(f"Agent error: {str(e)}")
+                self.execution_completed.emit(False)
+            try:
+                self.pool.discard(ssh)  # Never hand a half-started agent back to the pool
+                self.ssh = None
+            except:
+                pass
+            return
 
+        output_decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        started = False  # Events before our "started" belong to the program we replaced
+        while self.should_continue():
+            try:
+                output, events = agent.read()
+            except Exception as e:
+                self.error.emit(f"Agent connection lost: {str(e)}")
+                self.execution_completed.emit(False)
+                ssh.agent = None
+                return
+            if output:
+                self.output.emit(output_decoder.decode(output))
+            for event in events:
+                if event['event'] == 'started':
+                    started = True
+                elif event['event'] == 'restarting':
+                    self.status.emit("Old program did not stop, agent restarted")
+                elif event['event'] == 'exited' and started:
+                    if event.get('code', 0) == 0:
+                        self.status.emit("Execution successful!")
+                        self.execution_completed.emit(True)
+                        self.finished.emit()
+                    else:
+                        self.status.emit(f" Execution failed (exit code: {event.get('code')})")
+                        self.error.emit(f"Execution failed:\n{event.get('error', '')}")
+                        self.execution_completed.emit(False)
+                    return
+            if not agent.alive():
+                self.error.emit("Agent exited unexpectedly")
+                self.execution_completed.emit(False)
+                ssh.agent = None
+                return
+            agent.wait(self.READ_WAIT)
 
-    def reset_gpio_remotely(self):
+    def kill_process(self, reset_pins=None):
         """
-        Reset GPIO pins at Linux kernel level using sysfs interface.
-        This works regardless of which Python process configured the pins.
+        Stop the old program with one remote supervisor script and wait only as long as it needs.
+
+        The script sends SIGINT (so the program can run GPIO cleanup), polls every
+        STOP_POLL_INTERVAL seconds until it exits, escalates to SIGKILL after
+        STOP_TIMEOUT and gives up after KILL_TIMEOUT more. Pins in reset_pins are
+        then unexported at kernel level. It prints one summary line back.
+        In agent mode the agent is asked to stop its program instead.
         """
+        if self.agent is not None:
+            try:
+                self.agent.stop()
+            except Exception as e:
+                logging.error(f"Agent stop error: {e}")
+            return
+        pattern = "'[p]ython3.*File.py'"  # [p] keeps the pattern from matching this script's own command line
+        polls = int(self.STOP_TIMEOUT / self.STOP_POLL_INTERVAL)
+        kill_polls = int(self.KILL_TIMEOUT / self.STOP_POLL_INTERVAL)
+        unexport = "".join(f"echo {pin} > /sys/class/gpio/unexport 2>/dev/null; " for pin in (reset_pins or []))
+        script = (
+            f"pids=$(pgrep -f {pattern}); result=none; "
+            f"if [ -n \"$pids\" ]; then "
+            f"kill -INT $pids 2>/dev/null; result=stopped; i=0; "
+            f"while [ $i -lt {polls} ] && pgrep -f {pattern} >/dev/null; do sleep {self.STOP_POLL_INTERVAL}; i=$((i+1)); done; "
+            f"if pgrep -f {pattern} >/dev/null; then "
+            f"pkill -9 -f {pattern}; result=killed; i=0; "
+            f"while [ $i -lt {kill_polls} ] && pgrep -f {pattern} >/dev/null; do sleep {self.STOP_POLL_INTERVAL}; i=$((i+1)); done; "
+            f"pgrep -f {pattern} >/dev/null && result=stuck; "
+            f"fi; fi; "
+            f"{unexport}"
+            f"echo \"supervisor: $result\""
+        )
         try:
-            #logging.info("Executing kernel-level GPIO reset...")
-            
-            # Get list of all GPIO pins your application uses
-            # You need to collect these from Utils.devices
-            pins_to_reset = self.get_configured_pins()
-            
-            if not pins_to_reset:
-                pins_to_reset = [17]  # Fallback to default if detection fails
-            
-            #logging.info(f"Resetting pins: {pins_to_reset}")
-            
-            # Build compound command to reset all pins
-            reset_commands = []
-            for pin in pins_to_reset:
-                # Step 1: Unexport pin (releases from userspace control)
-                reset_commands.append(f"echo {pin} > /sys/class/gpio/unexport 2>/dev/null || true")
-            
-            # Execute all commands in one SSH call
-            full_command = " && ".join(reset_commands)
-            full_command += " && echo 'GPIO reset complete'"
-            
-            stdin, stdout, stderr = self.ssh.exec_command(full_command, timeout=5)
-            stdout.channel.recv_exit_status()  # Wait for completion
-            
-            output = stdout.read().decode().strip()
-            errors = stderr.read().decode().strip()
-            
-            if output:
-                logging.warning(f"Remote GPIO reset: {output}")
-            if errors and "No such file" not in errors:  # Ignore "file not found" for unexported pins
-                logging.error(f"Remote GPIO errors: {errors}")
-                
-            time.sleep(0.5)  # Allow kernel to process changes
-            
+            stdin, stdout, stderr = self.ssh.exec_command(script, timeout=self.STOP_TIMEOUT + self.KILL_TIMEOUT + 5)
+            result = stdout.read().decode().strip()
+            if result == "supervisor: killed":
+                logging.warning("Old program ignored SIGINT and was killed, GPIO cleanup may not have completed")
+            elif result == "supervisor: stuck":
+                logging.error("Old program is still running after SIGKILL")
+            elif not result.startswith("supervisor:"):
+                logging.error(f"Process termination failed: {stderr.read().decode().strip()}")
         except Exception as e:
-            logging.error(f"Remote GPIO reset failed: {e}")
+            logging.error(f"Process termination error: {e}")
 
     def get_configured_pins(self):
         """
@@ -463,11 +534,26 @@ class RPiExecutionThread(QThread):
 class PicoListenerThread(QThread):
     """
     Background thread to listen to Pico W serial output after a hard reset.
+
+    While the board resets it drops off USB. Instead of enumerating every port
+    4 times a second, the thread keeps trying to open the port the board was on
+    and only scans for its VID/PID once a second in case the port name changed.
+    Output is read with blocking bulk reads and emitted as it arrives; the
+    telemetry ingest thread splits it into lines and frames. If the board drops
+    off again (another reset), the thread waits for it to come back.
     """
     output = pyqtSignal(str)
     status = pyqtSignal(str)
     finished = pyqtSignal()
 
+    PICO_VID = 0x2E8A  # Raspberry Pi
+    PICO_PID = 0x0005  # Pico MicroPython
+    RESET_WAIT = 0.5  # Seconds for the board to drop off USB after machine.reset()
+    FIND_TIMEOUT = 15.0  # Seconds to wait for the board to reappear
+    PROBE_INTERVAL = 0.05  # Seconds between attempts to open the port
+    SCAN_INTERVAL = 1.0  # Seconds between VID/PID scans of all ports
+    READ_TIMEOUT = 0.1  # Seconds a read blocks; bounds how long stop() takes
+
     def __init__(self, port):
         super().__init__()
         self.port = port
@@ -475,69 +561,139 @@ class PicoListenerThread(QThread):
         self.ser = None
 
     def run(self):
-
         self.status.emit("Waiting for Pico to reboot...")
-        time.sleep(2.0)  # Short initial wait
-        
-        # 2. Dynamic Port Hunting Loop
-        # We will look for the Pico for up to 15 seconds
-        start_time = time.time()
-        new_port = None
-        # 1. Wait for Pico to reboot and reappear
-        while time.time() - start_time < 15:
-            # Search all active ports for the Pico's USB ID (0x2E8A = RPi, 0x0005 = Pico)
-            found = False
-            for p in serial.tools.list_ports.comports():
-                if (p.vid == 0x2E8A and p.pid == 0x0005):
-                    new_port = p.device
-                    found = True
-                    break
-            
-            if found:
-                break # We found it!
-            
-            time.sleep(0.25) # Check 4 times a second
-            
-        # 3. Handle specific failure (Timout or Success)
-        if not new_port:
-            self.status.emit(" Pico not found after reboot.")
-            self.finished.emit()
-            return
-            
-        # 4. Attempt Connection (with retries for "Access Denied" race conditions)
-        for attempt in range(5):
-            try:
-                self.port = new_port # Update port in case it changed (e.g. COM3 -> COM4)
-                self.ser = serial.Serial(self.port, 115200, timeout=1)
-                self.status.emit(f"Reconnected to {self.port}")
+        time.sleep(self.RESET_WAIT)
+
+        while self.running:
+            self.ser = self.reconnect()
+            if self.ser is None:
                 break
+            self.status.emit(f"Reconnected to {self.port}")
+            self.listen()
+            try:
+                self.ser.close()
             except Exception as e:
-                time.sleep(0.5)
-                if attempt == 4:
-                     self.status.emit(f"Connection failed: {str(e)}")
-                     self.finished.emit()
-                     return
+                logging.error(f"Error closing Pico serial port: {e}")
+            self.ser = None
+            if self.running:
+                self.status.emit("Pico disconnected, waiting for it to come back...")
 
-        # 5. Listen loop (Same as your original code)
-        self.running = True
-        while self.running and self.ser and self.ser.is_open:
-            try:
-                if self.ser.in_waiting:
-                    line = self.ser.readline().decode('utf-8', errors='ignore').strip()
-                    if line:
-                        self.output.emit(line)
-                else:
-                    time.sleep(0.01)
-            except Exception:
-                break
-        
-        if self.ser and self.ser.is_open:
-            self.ser.close()
         self.finished.emit()
 
+    def reconnect(self):
+        """Open the Pico's port once it is back, or return None after FIND_TIMEOUT"""
+        deadline = time.monotonic() + self.FIND_TIMEOUT
+        next_scan = time.monotonic() + self.SCAN_INTERVAL
+        foreign = False  # self.port belongs to another device: only the scan may move on from it
+        while self.running and time.monotonic() < deadline:
+            if not foreign:
+                try:
+                    ser = serial.Serial(self.port, 115200, timeout=self.READ_TIMEOUT)
+                    if self.is_pico(self.port):
+                        return ser
+                    ser.close()  # Another device took the name while the Pico was away
+                    foreign = True
+                    next_scan = time.monotonic()
+                except (serial.SerialException, OSError):
+                    pass  # Not back yet, or still held by the OS ("Access denied")
+            if time.monotonic() >= next_scan:
+                next_scan = time.monotonic() + self.SCAN_INTERVAL
+                for p in serial.tools.list_ports.comports():
+                    if p.vid == self.PICO_VID and p.pid == self.PICO_PID:
+                        foreign = False
+                        if p.device != self.port:
+                            self.port = p.device  # Came back under another name (e.g. COM3 -> COM4)
+                            break
+            time.sleep(self.PROBE_INTERVAL)
+
+        if self.running:
+            self.status.emit(" Pico not found after reboot.")
+        return None
+
+    def is_pico(self, port):
+        """Check the device now behind port by its USB VID/PID"""
+        return any(p.device == port and p.vid == self.PICO_VID and p.pid == self.PICO_PID
+                   for p in serial.tools.list_ports.comports())
+
+    def listen(self):
+        """Forward output until stopped or the port goes away"""
+        output_decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        while self.running:
+            try:
+                # Blocks until the first byte or READ_TIMEOUT, then takes everything buffered
+                data = self.ser.read(self.ser.in_waiting or 1)
+            except (serial.SerialException, OSError):
+                return
+            if data:
+                text = output_decoder.decode(data)
+                if text:
+                    self.output.emit(text)
+
     def stop(self):
         self.running = False
 
+class PicoDeployThread(QThread):
+    """
+    Background thread that uploads File.py to the Pico W as main.py and resets the board.
+    The file goes over in large raw-paste segments (Pyboard.fs_put_paste).
+    """
+    progress = pyqtSignal(int, int, float)  # Bytes written, total bytes, bytes per second
+    status = pyqtSignal(str)
+    error = pyqtSignal(str)
+    deployed = pyqtSignal(str)  # Port of the board now running the new program
+
+    def __init__(self, port):
+        super().__init__()
+        self.port = port
+
+    def run(self):
+        pyb = None
+        try:
+            pyb = Pyboard(self.port, 115200)
+            # Enter Raw REPL (stops current program)
+            pyb.enter_raw_repl()
+
+            # Upload File.py as main.py, unless the board already has this exact version
+            local_hash = Utils.file_digest("File.py")
+            stored_hash = pyb.exec_(
+                "import os\ntry:\n os.stat('main.py')\n print(open('main.py.sha256').read())\nexcept OSError:\n print('')"
+            ).decode().strip()
+            if self.isInterruptionRequested():
+                self.status.emit("Upload canceled")
+                return
+            if stored_hash == local_hash:
+                self.status.emit("main.py unchanged, upload skipped")
+            else:
+                pyb.exec_("try:\n os.remove('main.py.sha256')\nexcept OSError:\n pass")  # An interrupted upload must not look current
+                start_time = time.monotonic()
+
+                def on_progress(written, total):
+                    elapsed = time.monotonic() - start_time
+                    self.progress.emit(written, total, written / elapsed if elapsed > 0 else 0.0)
+
+                pyb.fs_put_paste("File.py", "main.py", progress_callback=on_progress)
+                pyb.fs_writefile("main.py.sha256", local_hash.encode())
+                self.status.emit(f"Uploaded main.py in {time.monotonic() - start_time:.2f} s")
+
+            if self.isInterruptionRequested():
+                self.status.emit("Stopped before starting the new program")
+                return  # The board stays in the raw REPL with its old program stopped
+
+            try:
+                pyb.exec_("import machine; machine.reset()")
+            except Exception as e:
+                logging.error(f"Error during reset command: {e}")
+        except Exception as e:
+            self.error.emit(str(e))
+            return
+        finally:
+            if pyb is not None:
+                try:
+                    pyb.close()
+                except Exception as e:
+                    logging.error(f"Error closing Pyboard connection: {e}")
+        self.deployed.emit(self.port)
+
 class GridScene(QGraphicsScene):
     def __init__(self, grid_size=25):
         super().__init__()
@@ -1527,7 +1683,16 @@ class GUI(QWidget):
         self.last_canvas = None
         self.blockIDs = {}
         self.execution_thread = None
+        self.execution_threads = {}  # host -> RPiExecutionThread of the current run
         self.pico_thread = None
+        self.pico_deploy_thread = None
+        self.rpi_stopper = None  # Thread running RPiExecutionThread.stop_all after a Stop
+        self.pico_progress_dialog = None
+        self.live_bindings = {'variables': {}, 'devices': {}}  # Reported name -> main canvas row ids showing its value
+        self.telemetry_recorder = TelemetryRecorder(Utils.get_base_path() / "telemetry")  # Report history, written off the GUI thread
+        self.telemetry_ingest = TelemetryIngestThread(self.telemetry_recorder)  # Decodes program output, emits coalesced updates
+        self.telemetry_ingest.updated.connect(self.on_telemetry_update)
+        self.telemetry_ingest.start()
         self.canvas_added = None
         self.pages = {}
         self.page_count = 0
@@ -1555,16 +1720,13 @@ class GUI(QWidget):
             #logging.info("Stopping Pico W")
             self.stop_pico_execution()
         else:
-            if self.execution_thread and self.execution_thread.isRunning():
-                #logging.info("Stopping execution thread...")
-                self.execution_thread.should_stop = True
-                self.execution_thread.kill_process()
-                self.execution_thread.stop()
-
-                if not self.execution_thread.wait(5000):
-                    #logging.info(f"Execution thread did not stop in time, terminating...")
-                    self.execution_thread.terminate()
-                    self.execution_thread.wait()
+            running = [thread for thread in self.execution_threads.values() if thread.isRunning()]
+            if running:
+                #logging.info("Stopping execution threads...")
+                # Supervisor scripts and joins take seconds per board: keep them off the GUI thread
+                self.rpi_stopper = threading.Thread(target=RPiExecutionThread.stop_all, args=(running,),
+                                                    name="RPiStopper", daemon=True)
+                self.rpi_stopper.start()
             else:
                 #logging.info("No execution thread is running.")
                 pass
@@ -3483,6 +3645,7 @@ class GUI(QWidget):
         Utils.variables['main_canvas'][var_id]['type_input'] = type_input
         Utils.variables['main_canvas'][var_id]['value_input'] = value_var_input
         Utils.variables['main_canvas'][var_id]['current_value_display'] = current_value
+        self.bind_live_value('variables', var_id, Utils.variables['main_canvas'][var_id]['name'])
         panel_layout = canvas_reference.var_layout
         panel_layout.insertWidget(panel_layout.count() - 1, canvas_reference.row_widget)
         
@@ -3616,6 +3779,7 @@ class GUI(QWidget):
         Utils.devices['main_canvas'][device_id]['type_input'] = type_input
         Utils.devices['main_canvas'][device_id]['value_input'] = value_dev_input
         Utils.devices['main_canvas'][device_id]['current_state_display'] = current_state
+        self.bind_live_value('devices', device_id, Utils.devices['main_canvas'][device_id]['name'])
 
     def Clear_All_Devices(self):
         #logging.info("Clearing all devices")
@@ -3656,6 +3820,7 @@ class GUI(QWidget):
             for canvas, info in Utils.canvas_instances.items():
                 if canvas_reference == canvas:
                     if info['ref'] == 'canvas':
+                        self.unbind_live_value('variables', var_id, Utils.variables['main_canvas'][var_id]['name'])
                         del Utils.variables['main_canvas'][var_id]
                         for input, var_ids in Utils.vars_same.items():
                             if var_id in var_ids:
@@ -3689,6 +3854,7 @@ class GUI(QWidget):
             for canvas, info in Utils.canvas_instances.items():
                 if canvas_reference == canvas:
                     if info['ref'] == 'canvas':
+                        self.unbind_live_value('devices', var_id, Utils.devices['main_canvas'][var_id]['name'])
                         del Utils.devices['main_canvas'][var_id]
                         for input, dev_ids in Utils.devs_same.items():
                             if var_id in dev_ids:
@@ -3786,7 +3952,9 @@ class GUI(QWidget):
             for canvas, info in Utils.canvas_instances.items():
                 if canvas_reference == canvas:
                     if info['ref'] == 'canvas':
+                        self.unbind_live_value('variables', var_id, Utils.variables['main_canvas'][var_id]['name'])
                         Utils.variables['main_canvas'][var_id]['name'] = text
+                        self.bind_live_value('variables', var_id, text)
                         break
                     elif info['ref'] == 'function':
                         for function_id, function_info in Utils.functions.items():
@@ -3827,7 +3995,9 @@ class GUI(QWidget):
             for canvas, info in Utils.canvas_instances.items():
                 if canvas_reference == canvas:
                     if info['ref'] == 'canvas':
+                        self.unbind_live_value('devices', var_id, Utils.devices['main_canvas'][var_id]['name'])
                         Utils.devices['main_canvas'][var_id]['name'] = text
+                        self.bind_live_value('devices', var_id, text)
                         break
                     elif info['ref'] == 'function':
                         for function_id, function_info in Utils.functions.items():
@@ -3981,20 +4151,35 @@ class GUI(QWidget):
                                 Utils.devices['function_canvases'][function_id][id]['PIN'] = input
                                 break    
                                 
-    def update_current_values(self):
-        for var_name, var in Utils.reports['variables'].items():
-            for var_id in Utils.variables['main_canvas'].keys():
-                if Utils.variables['main_canvas'][var_id]['name'] == var_name:
-                    widget = Utils.variables['main_canvas'][var_id]['current_value_display']
-                    widget.setText(str(var['value']))
-        for dev_name, dev in Utils.reports['devices'].items():
-            for dev_id in Utils.devices['main_canvas'].keys():
-                if Utils.devices['main_canvas'][dev_id]['name'] == dev_name:
-                    widget = Utils.devices['main_canvas'][dev_id]['current_state_display']
-                    if Utils.reports['devices'][dev_name]['type'] == "PWM":
-                        widget.setText(str(dev['value']) + "%")
-                    else:
-                        widget.setText(str(dev['state']))
+    def bind_live_value(self, kind, item_id, name):
+        """Index a main canvas variable/device row under the name reports use for it"""
+        ids = self.live_bindings[kind].setdefault(name, []) if name else None
+        if ids is not None and item_id not in ids:
+            ids.append(item_id)
+
+    def unbind_live_value(self, kind, item_id, name):
+        ids = self.live_bindings[kind].get(name)
+        if ids and item_id in ids:
+            ids.remove(item_id)
+            if not ids:
+                del self.live_bindings[kind][name]
+
+    def update_current_values(self, report=None):
+        """Show reported values in the variable/device panels; report defaults to Utils.reports"""
+        if report is None:
+            report = Utils.reports
+        for var_name, var in report.get('variables', {}).items():
+            text = str(var['value'])
+            for var_id in self.live_bindings['variables'].get(var_name, ()):
+                widget = Utils.variables['main_canvas'][var_id]['current_value_display']
+                if widget.text() != text:
+                    widget.setText(text)
+        for dev_name, dev in report.get('devices', {}).items():
+            text = str(dev['value']) + "%" if dev['type'] == "PWM" else str(dev['state'])
+            for dev_id in self.live_bindings['devices'].get(dev_name, ()):
+                widget = Utils.devices['main_canvas'][dev_id]['current_state_display']
+                if widget.text() != text:
+                    widget.setText(text)
         
     #MARK: - Other Methods
     def compile_code(self):
@@ -4121,6 +4306,7 @@ class GUI(QWidget):
             'main_canvas': {},
             'function_canvases': {}
         }
+        self.live_bindings = {'variables': {}, 'devices': {}}
 
         if self.main_layout is not None:
             #logging.info(f"Main layout {self.main_layout} exists, clearing widgets")
@@ -4138,6 +4324,7 @@ class GUI(QWidget):
         self.last_canvas = None
         self.blockIDs = {}
         self.execution_thread = None
+        self.execution_threads = {}  # host -> RPiExecutionThread of the current run
         self.pico_thread = None
         self.canvas_added = None
         self.pages = {}
@@ -4203,6 +4390,21 @@ class GUI(QWidget):
             
             #logging.info("All separators deleted.")    
         
+    def close_telemetry(self):
+        """Stop the ingest thread, then flush and close the recorder"""
+        self.telemetry_ingest.stop()
+        self.telemetry_ingest.wait()
+        self.telemetry_recorder.close()
+
+    def close_connections(self):
+        """Close the SSH connections kept alive between runs and finish any RPi stop or Pico upload"""
+        SSHConnectionPool.get_instance().close_all()
+        if self.rpi_stopper is not None:
+            self.rpi_stopper.join()  # Qt must not destroy the execution threads it is still stopping
+        if self.pico_deploy_thread is not None:
+            self.pico_deploy_thread.requestInterruption()
+            self.pico_deploy_thread.wait()  # Qt must not destroy a running QThread
+
     def close_child_windows(self):
         
         # Close blocks window if it exists
@@ -4266,15 +4468,8 @@ class GUI(QWidget):
             
             if rpi_model == 0:  # Pico W
                 #logging.info("Target: Pico W (MicroPython)")
-                if self.execute_on_pico_w():
-                    #logging.info("Code executed successfully!")
-                    QMessageBox.information(
-                        self,
-                        self.t("main_GUI.dialogs.progress_dialogs.success"),
-                        self.t("main_GUI.dialogs.progress_dialogs.success_message"),
-                        QMessageBox.StandardButton.Ok
-                    )
-                else:
+                # Success is reported by the deploy thread once the board runs the code
+                if not self.execute_on_pico_w():
                     logging.warning("Execution warning - Check device connection")
                     QMessageBox.warning(
                         self,
@@ -4320,54 +4515,23 @@ class GUI(QWidget):
         """Handle status updates from execution thread"""
         #logging.info(f"[RPi Status] {status}")
     
-    def on_execution_output(self, output):
-        """Handle output from execution thread"""
-        #logging.info(f"[RPi Output] {output}")
-
-        output = str(output).strip()
-        if output.startswith("MicroPython") or 'Type "help()"' in output or output == ">>>":
-            return
+    def on_telemetry_update(self, changed, text_lines):
+        """
+        Handle a coalesced update from the telemetry ingest thread.
+        changed holds only the values that changed since the previous update.
+        """
+        Utils.reports.setdefault('variables', {}).update(changed['variables'])
+        Utils.reports.setdefault('devices', {}).update(changed['devices'])
+        self.update_current_values(changed)
 
-        if '__REPORT__' not in str(output):
+        if text_lines:
             #logging.info(output)  # Regular log output
             QMessageBox.information(
                 self,
                 self.t("main_GUI.dialogs.progress_dialogs.execution_output"),
-                output,
+                "\n".join(text_lines),
                 QMessageBox.StandardButton.Ok
             )
-        else:
-            try:
-                # Split by tag to handle cases where output has text before the tag
-                parts = str(output).split('__REPORT__')
-                
-                # parts[0] is garbage/text before the tag
-                # parts[1] starts with the JSON, but may have trailing data (newlines, next logs)
-                if len(parts) > 1:
-                    json_candidate = parts[1]
-                    
-                    # FIX: Use raw_decode instead of loads.
-                    # raw_decode returns a tuple: (json_data, index_where_json_ended)
-                    # This ignores any "Extra data" (newlines, subsequent logs) automatically.
-                    data, _ = json.JSONDecoder().raw_decode(json_candidate)
-                    
-                    Utils.reports = data
-                    #logging.info("Reports received:", Utils.reports)
-                    
-                    # Update GUI
-                    self.update_current_values()
-                    
-                    # Save local copy
-                    Reports_path = Utils.get_base_path()
-                    os.makedirs(Reports_path, exist_ok=True)
-                    with open(Reports_path / "last_report.txt", "a") as f:
-                        json.dump(data, f, indent=4, ensure_ascii=False)
-                    #logging.info(parts[0])  # Print any text before the tag (optional)
-                        
-            except json.JSONDecodeError as e:
-                logging.error(f"JSON Decode Error (Chunk might be incomplete): {e}")
-            except Exception as e:
-                logging.error(f"Error processing report: {e}")
 
     def on_execution_error(self, error):
         """Handle errors from execution thread"""
@@ -4379,7 +4543,8 @@ class GUI(QWidget):
             QMessageBox.StandardButton.Ok
         )
 
-    def on_host_key_verification(self, hostname, key_type, fingerprint):
+    def on_host_key_verification(self, hostname, key_type, fingerprint, thread=None):
+        thread = thread or self.execution_thread  # The thread whose connection waits for the answer
 
         reply = QMessageBox.question(
             self,
@@ -4390,16 +4555,19 @@ class GUI(QWidget):
         )
 
         if reply == QMessageBox.StandardButton.Yes:
-            self.execution_thread.key_prompt_accept = True
+            thread.key_prompt_accept = True
         else:
-            self.execution_thread.key_prompt_accept = False
+            thread.key_prompt_accept = False
 
-        self.execution_thread.key_prompt_event.set()
+        thread.key_prompt_event.set()
 
     def execute_on_pico_w(self):
         """
         Execute on Pico W using native pyboard library (No subprocess/Admin rights needed)
         """
+        if self.pico_deploy_thread is not None and self.pico_deploy_thread.isRunning():
+            logging.warning("A Pico upload is still in progress")
+            return False
         self.stop_pico_execution()  # Ensure any existing execution is stopped before starting new one
         #logging.info("Searching for Pico W...")
         target_port = None
@@ -4419,52 +4587,71 @@ class GUI(QWidget):
             return False
 
         #logging.info(f"Found Pico on {target_port}")
+        Utils.config['pico_port'] = target_port  # Save for future use
+
+        # 2. Upload and reset on a worker thread; the progress dialog shows throughput
+        self.pico_progress_dialog = QProgressDialog(self.t("main_GUI.dialogs.progress_dialogs.uploading_pico"), "", 0, 0, self)
+        self.pico_progress_dialog.setCancelButton(None)  # Aborting mid raw-paste would leave the board waiting for data
+        self.pico_progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        self.pico_progress_dialog.setMinimumDuration(0)
+        self.pico_progress_dialog.show()
+
+        self.pico_deploy_thread = PicoDeployThread(target_port)
+        self.pico_deploy_thread.progress.connect(self.on_pico_upload_progress)
+        self.pico_deploy_thread.status.connect(self.on_execution_status)
+        self.pico_deploy_thread.deployed.connect(self.on_pico_deployed)
+        self.pico_deploy_thread.error.connect(self.on_pico_deploy_error)
+        self.pico_deploy_thread.finished.connect(self.close_pico_progress)  # Also after a canceled upload
+        self.pico_deploy_thread.start()
+        return True
+
+    def on_pico_upload_progress(self, written, total, bytes_per_second):
+        if self.pico_progress_dialog is None:
+            return
+        self.pico_progress_dialog.setMaximum(total)
+        self.pico_progress_dialog.setValue(written)
+        self.pico_progress_dialog.setLabelText(self.t("main_GUI.dialogs.progress_dialogs.uploading_pico_speed").format(
+            written=written / 1024, total=total / 1024, speed=bytes_per_second / 1024))
 
-        try:
-            # 2. Connect directly using Pyboard class
-            pyb = Pyboard(target_port, 115200)
-            Utils.config['pico_port'] = target_port  # Save for future use
-            # Enter Raw REPL (stops current program)
-            pyb.enter_raw_repl()
-            
-            # 3. Upload File.py as main.py
-            #logging.info("Uploading main.py...")
-            with open("File.py", "rb") as f:
-                pyb.fs_put("File.py", "main.py")     
-            #logging.info("Upload complete")
+    def close_pico_progress(self):
+        if self.pico_progress_dialog is not None:
+            self.pico_progress_dialog.close()
+            self.pico_progress_dialog = None
 
-            #logging.info("Resetting board to start code...")
-            try:
-                pyb.exec_("import machine; machine.reset()")  
-            except Exception as e:
-                logging.error(f"Error during reset command: {e}")
-            
-            # Give it a moment to flush the command before closing
-            QTimer.singleShot(500)
+    def on_pico_deployed(self, port):
+        """The board was reset into the new main.py: listen to its output"""
+        self.close_pico_progress()
 
-            try:
-                pyb.close()
-            except Exception as e:
-                logging.error(f"Error closing Pyboard connection: {e}")
+        if hasattr(self, 'pico_thread') and self.pico_thread is not None:
+            self.pico_thread.stop()
+            self.pico_thread.wait()
 
-            if hasattr(self, 'pico_thread') and self.pico_thread is not None:
-                self.pico_thread.stop()
-                self.pico_thread.wait()
+        self.telemetry_ingest.reset()
+        Utils.reports = {'variables': {}, 'devices': {}}
+        self.pico_thread = PicoListenerThread(port)
+        self.pico_thread.output.connect(self.telemetry_ingest.feed, Qt.ConnectionType.DirectConnection) # Parsed on the ingest thread
+        self.pico_thread.status.connect(self.on_execution_status)
+        self.pico_thread.start()
 
-            self.pico_thread = PicoListenerThread(target_port)
-            self.pico_thread.output.connect(self.on_execution_output) # Reuse existing parser
-            self.pico_thread.status.connect(self.on_execution_status)
-            self.pico_thread.start()
+        QMessageBox.information(
+            self,
+            self.t("main_GUI.dialogs.progress_dialogs.success"),
+            self.t("main_GUI.dialogs.progress_dialogs.success_message"),
+            QMessageBox.StandardButton.Ok
+        )
 
-            return True
+    def on_pico_deploy_error(self, error):
+        self.close_pico_progress()
+        logging.error(f"Execution Error: {error}")
+        QMessageBox.critical(self, "Execution Error", f"Failed to upload code:\n{error}")
 
-        except Exception as e:
-            logging.error(f"Execution Error: {e}")
-            QMessageBox.critical(self, "Execution Error", f"Failed to upload code:\n{str(e)}")
-            return False
-    
     def stop_pico_execution(self):
 
+        if self.pico_deploy_thread is not None and self.pico_deploy_thread.isRunning():
+            # The upload holds the serial port; it stops before resetting the board into the new program
+            self.pico_deploy_thread.requestInterruption()
+            return
+
         if hasattr(self, 'pico_thread') and self.pico_thread is not None:
             #logging.info("Stopping listener thread...")
             self.pico_thread.stop()
@@ -4495,22 +4682,25 @@ class GUI(QWidget):
 
     def execute_on_rpi_ssh_background(self):
         """
-        Execute code on RPi in background thread.
+        Execute code on RPi in background threads, one per board.
+
+        The compiled File.py goes to rpi_host and every host in rpi_targets at
+        the same time, each over its own pooled SSH connection, so a lab of
+        boards takes about as long as one.
         """
         try:
             # ===== STEP 1: Stop old execution if running =====
-            if self.execution_thread is not None and self.execution_thread.isRunning():
+            if self.rpi_stopper is not None and self.rpi_stopper.is_alive():
+                # Its supervisor scripts would kill the program this run starts
+                self.rpi_stopper.join()
+            running = [thread for thread in self.execution_threads.values() if thread.isRunning()]
+            for thread in running:
                 #logging.info("Stopping previous execution...")
-                self.execution_thread.stop()  # Signal it to stop
-                
-                # Wait for thread to finish (max 5 seconds)
-                if not self.execution_thread.wait(5000):
-                    logging.warning("Thread didn't stop gracefully")
-                    # Optional: Force terminate (not recommended, but available)
-                    # self.execution_thread.terminate()
-                    pass
-                
-                #logging.info("Previous execution stopped")
+                thread.stop()  # Signal it to stop
+            # One shared deadline, so a lab of boards waits no longer than one board
+            if RPiExecutionThread.wait_all(running, RPiExecutionThread.JOIN_TIMEOUT):
+                logging.warning("Thread didn't stop gracefully")
+            #logging.info("Previous execution stopped")
             
             # ===== STEP 2: Get RPi settings =====
             rpi_host = Utils.app_settings.rpi_host
@@ -4526,24 +4716,56 @@ class GUI(QWidget):
                 )
                 return
             
-            # ===== STEP 3: Create new thread =====
-            ssh_config = {
-                'filepath': 'File.py',  # Your compiled file
-                'rpi_host': rpi_host,
-                'rpi_user': rpi_user,
-                'rpi_password': rpi_password,
-            }
-            
-            self.execution_thread = RPiExecutionThread(ssh_config)
-            
-            # Connect signals to UI slots
-            self.execution_thread.status.connect(self.on_execution_status)
-            self.execution_thread.output.connect(self.on_execution_output)
-            self.execution_thread.error.connect(self.on_execution_error)
-            self.execution_thread.host_key_verification.connect(self.on_host_key_verification)
-            
-            # ===== STEP 4: Start execution =====
-            self.execution_thread.start()
+            hosts = [rpi_host]
+            for host in getattr(Utils.app_settings, 'rpi_targets', '').replace(";", ",").split(","):
+                if host.strip() and host.strip() not in hosts:
+                    hosts.append(host.strip())
+            multi_board = len(hosts) > 1
+            
+            # ===== STEP 3: Create new threads =====
+            if multi_board:
+                deployment_window = DeploymentWindow.get_instance(self)
+                deployment_window.set_hosts(hosts)
+                for signal in (deployment_window.source_selected, self.telemetry_ingest.activity):
+                    try:
+                        signal.disconnect()
+                    except TypeError:
+                        pass  # Nothing connected yet
+                deployment_window.source_selected.connect(self.telemetry_ingest.select)
+                self.telemetry_ingest.activity.connect(deployment_window.add_reports)
+                deployment_window.open()
+            
+            self.telemetry_ingest.reset(hosts[0] if multi_board else None)
+            Utils.reports = {'variables': {}, 'devices': {}}
+            self.execution_threads = {}
+            for host in hosts:
+                ssh_config = {
+                    'filepath': 'File.py',  # Your compiled file
+                    'rpi_host': host,
+                    'rpi_user': rpi_user,
+                    'rpi_password': rpi_password,
+                    'use_agent': getattr(Utils.app_settings, 'rpi_agent', False),
+                }
+                thread = RPiExecutionThread(ssh_config)
+                
+                # Connect signals to UI slots
+                thread.host_key_verification.connect(
+                    lambda hostname, key_type, fingerprint, t=thread: self.on_host_key_verification(hostname, key_type, fingerprint, t))
+                if multi_board:
+                    # Output is tagged with its board so the ingest keeps boards apart
+                    thread.output.connect(lambda text, h=host: self.telemetry_ingest.feed(text, h), Qt.ConnectionType.DirectConnection)
+                    thread.status.connect(lambda status, h=host: deployment_window.set_status(h, status))
+                    thread.error.connect(lambda error, h=host: deployment_window.set_status(h, error))
+                else:
+                    thread.output.connect(self.telemetry_ingest.feed, Qt.ConnectionType.DirectConnection)
+                    thread.status.connect(self.on_execution_status)
+                    thread.error.connect(self.on_execution_error)
+                self.execution_threads[host] = thread
+            self.execution_thread = self.execution_threads[rpi_host]
+            
+            # ===== STEP 4: Start execution on every board at once =====
+            for thread in self.execution_threads.values():
+                thread.start()
             #logging.info("New execution started")
         
         except Exception as e:
@@ -13,14 +13,23 @@ This is the SINGLE SOURCE OF TRUTH for imports.
 import sys
 import os
 import json
+import hashlib
+import struct
+import binascii
+import codecs
 import threading
+import queue
+import select
 import paramiko
 import subprocess
+import shutil
+import tempfile
 import ctypes
 import math
 import time
 import warnings
 from datetime import datetime
+from collections import deque
 from pathlib import Path
 import logging
 # ============================================================================
@@ -34,7 +43,7 @@ from PyQt6.QtWidgets import (
     QSplitter, QTreeWidget, QTreeWidgetItem, QListWidget, QGraphicsView, QGraphicsScene,
     QGraphicsRectItem, QGraphicsPathItem, QGraphicsItem, QGraphicsPixmapItem, QGraphicsObject,
     QListWidgetItem, QStackedWidget, QGraphicsEllipseItem, QSplashScreen,
-    QTextBrowser, QToolBar, QSlider
+    QTextBrowser, QToolBar, QSlider, QCheckBox
 )
 from PyQt6.QtCore import (
     Qt, QPoint, QRect, QSize, pyqtSignal, QRegularExpression, QTimer, QEvent,
@@ -63,6 +72,26 @@ def get_Graphic_Programing_Window():
     from GUI_pyqt import GUI, GridCanvas
     return GUI, GridCanvas
 
+def get_Telemetry():
+    """Lazy import telemetry framing - avoid circular import"""
+    from telemetry import FrameDecoder, decode_report, TelemetryRecorder, TelemetryIngestThread
+    return FrameDecoder, decode_report, TelemetryRecorder, TelemetryIngestThread
+
+def get_SSH_Pool():
+    """Lazy import SSHConnectionPool - avoid circular import"""
+    from ssh_pool import SSHConnectionPool
+    return SSHConnectionPool
+
+def get_RPi_Agent():
+    """Lazy import RPiAgent - avoid circular import"""
+    from rpi_agent import RPiAgent
+    return RPiAgent
+
+def get_Deployment_Window():
+    """Lazy import DeploymentWindow - avoid circular import"""
+    from deployment_window import DeploymentWindow
+    return DeploymentWindow
+
 def get_Code_Compiler():
     """Lazy import CodeCompiler - avoid circular import"""
     from code_compiler import CodeCompiler
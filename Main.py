@@ -597,12 +597,6 @@ class MainWindow(QMainWindow):
         except Exception as e:
             logging.error("Error resetting File.py")
 
-        try:
-            with open("last_report.txt", "w") as f:
-                f.write("")
-        except Exception as e:
-            logging.error("Error resetting last_report.txt")
-
         try:
             if os.path.exists("error_log.txt") and os.path.getsize("error_log.txt") > 5 * 1024 * 1024:  # If log file is larger than 5MB
                 with open("error_log.txt", "w") as f:
@@ -1191,6 +1185,8 @@ class MainWindow(QMainWindow):
                 # Empty untitled project, just close
                 self.visual_programming_window.clear_canvas()
                 self.visual_programming_window.close_child_windows()
+                self.visual_programming_window.close_telemetry()
+                self.visual_programming_window.close_connections()
                 import gc
                 gc.collect()
                 event.accept()
@@ -1237,6 +1233,8 @@ class MainWindow(QMainWindow):
         # Cleanup and close
         self.visual_programming_window.clear_canvas()
         self.visual_programming_window.close_child_windows()
+        self.visual_programming_window.close_telemetry()
+        self.visual_programming_window.close_connections()
         event.accept()
 
 #MARK: - Main Application Setup
@@ -1,4 +1,9 @@
-from Imports import AppSettings, ProjectData, sys, os, Path
+import sys
+import os
+import hashlib
+from pathlib import Path
+from App_settings import AppSettings
+from Project_Data import ProjectData
 app_settings = AppSettings()
 project_data = ProjectData()
 # ============================================================================
@@ -56,4 +61,9 @@ def get_base_path():
         return Path(os.path.dirname(sys.executable))
     else:
         # If running as a normal Python script
-        return Path(os.path.dirname(os.path.abspath(__file__)))
\ No newline at end of file
+        return Path(os.path.dirname(os.path.abspath(__file__)))
+
+def file_digest(path):
+    """sha256 hex digest of a file, used to skip uploading code the board already has"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
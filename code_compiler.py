@@ -1,5 +1,22 @@
-from Imports import get_Utils, logging
-Utils = get_Utils()
+import logging
+import json
+import hashlib
+import os
+import shutil
+import tempfile
+import Utils
+
+# Runtime-only keys (Qt objects, geometry) that never affect the generated code
+CACHE_IGNORED_KEYS = ('widget', 'canvas', 'item', 'color', 'x', 'y', 'width', 'height', 'waypoints')
+SECTION_SPOOL_SIZE = 1024 * 1024  # Bytes a section keeps in memory before spilling to a temp file
+OUTPUT_BUFFER_SIZE = 64 * 1024  # Write buffer for the generated file
+# Blocks that only set outputs from the current inputs: a loop made of these can sleep until a button edge
+EVENT_IDLE_TYPES = ('Button', 'LED_ON', 'LED_OFF', 'Switch', 'PWM_LED', 'RGB_LED', 'Networks', 'End',
+                    'Lower', 'Greater', 'Equal', 'Not_equal', 'Greater_equal', 'Lower_equal',
+                    'And', 'Or', 'Nand', 'Nor', 'Xor', 'Xnor')
+EVENT_WAIT_TIMEOUT = 1.0  # Seconds an idle loop sleeps before re-running without an edge
+POLLED_INPUT_INTERVAL = 0.01  # Seconds an idle loop sleeps when some input pins cannot raise edges
+FULL_REPORT_TICKS = 50  # Delta reporter passes between full snapshots (about 5 s when idle)
 
 #MARK: Code Compiler
 class CodeCompiler:
@@ -12,14 +29,21 @@ class CodeCompiler:
         self.GPIO_compile = False  # GPIO mode flag
         self.compiling_function = None  # Current function being compiled
         self.compiling_what = 'canvas'  # 'canvas' or 'function'
-        self.header_lines = []
-        self.main_lines = []
-        self.function_lines = []
-        self.footer_lines = []
+        self.header_out = None  # Section spools, see new_section()
+        self.main_out = None
+        self.function_out = None
+        self.footer_out = None
         self.last_block = None
         self.btn_in_code = False
         self.led_in_code = False
-        self.current_lines = self.header_lines  # Pointer to current lines being written
+        self.event_inputs = False  # Buttons via edge interrupts instead of polling
+        self.delta_telemetry = False  # Reporter sends only changed keys between snapshots
+        self.binary_telemetry = False  # Reports as length-prefixed struct frames instead of JSON lines
+        self.current_out = None  # Section currently being written
+        self.compile_cache = {}  # Section name or ('function', id) -> {'key': content hash, emitted spools or text, ...}
+        self.compile_mode = None  # Target and settings tuple every cache key includes
+        self.function_hashes = {}  # Canvas id -> content hash of the canvases reachable from Start
+        self.open_functions = []  # (func_id, cache key, call block, start offset) of definitions being emitted
         self.process_map = {
             'If': self.handle_if_block,
             'While': self.handle_while_block,
@@ -62,16 +86,14 @@ class CodeCompiler:
             "Return": self.handle_return_block
         }
     
-    def compile(self):
+    def compile(self, output_path="File.py"):
         """Main entry point"""
         self.MC_compile = False
         self.GPIO_compile = False
         self.indent_level = 0
-        self.header_lines = []
-        self.main_lines = []
-        self.function_lines = []
-        self.footer_lines = []
-        self.current_lines = self.header_lines
+        self.event_inputs = getattr(Utils.app_settings, 'event_driven_inputs', False)
+        self.delta_telemetry = getattr(Utils.app_settings, 'delta_telemetry', False)
+        self.binary_telemetry = getattr(Utils.app_settings, 'binary_telemetry', False)
         #logging.info("Compiling code to File.py...")
         #logging.info(f"RPI Model: {Utils.app_settings.rpi_model}")
         #logging.info(f"RPI Model Index: {Utils.app_settings.rpi_model_index}")
@@ -82,21 +104,105 @@ class CodeCompiler:
             #logging.info(f"RPI Model selected: {Utils.app_settings.rpi_model} (Index: {Utils.app_settings.rpi_model_index})")
             self.GPIO_compile = True
 
+        self.create_adjacency_index()
+        self.create_symbol_tables()
+        self.analyze_reachability()
+
+        # Only functions the program can call are registered for compilation
         self.func_to_compile = {}
+        for func_id in self.reachable_functions:
+            self.func_to_compile[func_id] = Utils.functions[func_id]['name'], "Not Compiled", ""
 
-        for func_id, func_info in Utils.functions.items():
-            #logging.info(f"Registering function for compilation: {func_info['name']} (ID: {func_id})")
-            if func_id not in self.func_to_compile:
-                #logging.info(f"Adding function '{func_info['name']}' to compilation list with ID: {func_id}")
-                self.func_to_compile[func_id] = func_info['name'], "Not Compiled", ""
+        canvas_hashes = self.hash_canvases()
+        mode = self.compile_mode = ('MC' if self.MC_compile else 'GPIO' if self.GPIO_compile else None,
+                                    self.event_inputs, self.delta_telemetry, self.binary_telemetry)
+
+        header_key = self.content_hash(mode, canvas_hashes['symbols'], sorted(self.reachable_types), list(self.used_devices))
+        header = self.compile_cache.get('header')
+        if header and header['key'] == header_key:
+            self.header_out = header['out']
+            self.btn_in_code, self.led_in_code = header['flags']
+        else:
+            self.header_out = self.current_out = self.new_section()
+            self.write_imports()
+            self.write_setup()
+            self.write_reporting_system()
+            self.store_section('header', header_key, out=self.header_out,
+                               flags=(self.btn_in_code, self.led_in_code))
 
-        self.create_hashmap()
+        # Function definitions are cached one entry per function inside write_program, so
+        # re-emitting the main program replays the text of every function that did not change
+        self.function_hashes = canvas_hashes['canvases']
+        program_key = self.content_hash(mode, self.btn_in_code, self.led_in_code, canvas_hashes['canvases'])
+        program = self.compile_cache.get('program')
+        if program and program['key'] == program_key:
+            self.function_out = program['function_out']
+            self.main_out = program['main_out']
+            self.indent_level = program['indent_level']
+        else:
+            self.function_out = self.new_section()
+            self.main_out = self.new_section()
+            self.open_functions = []
+            self.write_program()
+            self.store_section('program', program_key, function_out=self.function_out,
+                               main_out=self.main_out, indent_level=self.indent_level)
+            stale = [name for name in self.compile_cache if isinstance(name, tuple) and name[1] not in self.function_hashes]
+            for name in stale:
+                del self.compile_cache[name]  # Function deleted or no longer called
 
-        self.write_imports()
-        self.write_setup()
-        self.write_reporting_system()
-        
-        self.current_lines = self.main_lines
+        footer_key = self.content_hash(mode, self.indent_level)
+        footer = self.compile_cache.get('footer')
+        if footer and footer['key'] == footer_key:
+            self.footer_out = footer['out']
+        else:
+            self.footer_out = self.current_out = self.new_section()
+            self.write_cleanup()
+            self.store_section('footer', footer_key, out=self.footer_out)
+
+        self.write_output(output_path)
+
+    def new_section(self):
+        """Spool for one section of the generated file; spills to disk when it grows large"""
+        return tempfile.SpooledTemporaryFile(max_size=SECTION_SPOOL_SIZE, mode='w+', encoding='utf-8', newline='')
+
+    def store_section(self, name, key, **entry):
+        """Remember emitted section spools for reuse, closing the ones they replace"""
+        old = self.compile_cache.get(name)
+        if old:
+            for value in old.values():
+                if hasattr(value, 'close'):
+                    value.close()
+        entry['key'] = key
+        self.compile_cache[name] = entry
+
+    def write_output(self, path):
+        """Stream all sections into a temp file next to path, then atomically replace path.
+
+        A failure part way through leaves the previous file untouched.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".File-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", buffering=OUTPUT_BUFFER_SIZE) as file:
+                for section in (self.header_out, self.function_out, self.main_out, self.footer_out):
+                    section.seek(0)
+                    shutil.copyfileobj(section, file, OUTPUT_BUFFER_SIZE)
+                file.flush()
+                os.fsync(file.fileno())
+            os.chmod(tmp_path, 0o644)  # mkstemp creates owner-only files
+            os.replace(tmp_path, path)
+            #logging.info(f"Code written to {path}")
+        except Exception:
+            logging.error(f"Error writing {path}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def write_program(self):
+        """Emit function definitions and the main program reachable from Start"""
+        self.current_out = self.main_out
         # Find Start block
         start_block = self.find_block_by_type('Start')
         if start_block:
@@ -123,37 +229,35 @@ class CodeCompiler:
             #logging.info(f"Processing blocks starting from: {next_id}")
             self.process_block(next_id)
             self.indent_level -= 1
-        self.current_lines = self.footer_lines
-        self.write_cleanup()
-        file = open("File.py", "w")
-        if file:
-            file.writelines(self.header_lines)
-            file.writelines(self.function_lines)
-            file.writelines(self.main_lines)
-            file.writelines(self.footer_lines)
-            #logging.info("Code written to File.py")
-        else:
-            logging.error("Error opening File.py for writing")
-        file.close()
-            
-    
 
     def process_block(self, block_id):
-        """Process single block - dispatch to handler"""
-        if not block_id:
-            return
-        if self.compiling_what == 'canvas':
-            block = Utils.main_canvas['blocks'][block_id]
-        elif self.compiling_what == 'function':
-            block = Utils.functions[self.compiling_function]['blocks'][block_id]
+        """Emit a block and everything reachable from it.
 
-        #logging.info(f"Processing block {block_id} of type {block['type']}")
-        
-        handler = self.process_map.get(block['type'])
-        if handler:
-            handler(block)
-        else:
-            logging.warning(f"No handler for block type: {block['type']} (Block ID: {block_id})")
+        Handlers are generators that yield the id of each block they need emitted
+        before they can continue. Suspended handlers wait on an explicit stack
+        (holding their branch state while self.indent_level tracks indentation),
+        so long chains do not grow the Python call stack.
+        """
+        stack = []
+        next_id = block_id
+        while True:
+            if next_id:
+                if self.compiling_what == 'canvas':
+                    block = Utils.main_canvas['blocks'][next_id]
+                elif self.compiling_what == 'function':
+                    block = Utils.functions[self.compiling_function]['blocks'][next_id]
+                handler = self.process_map.get(block['type'])
+                if handler:
+                    stack.append(handler(block))
+                else:
+                    logging.warning(f"No handler for block type: {block['type']} (Block ID: {next_id})")
+            if not stack:
+                return
+            try:
+                next_id = next(stack[-1])  # Resume the innermost handler until it asks for a block
+            except StopIteration:
+                stack.pop()
+                next_id = None
     #MARK: Code Setup
     def write_imports(self):
         #logging.info("Writing import statements...")
@@ -163,6 +267,11 @@ class CodeCompiler:
             self.writeline("import sys")
             self.writeline("import signal")
             self.writeline("import threading")
+            if self.event_inputs and 'Button' in self.reachable_types:
+                self.writeline("import queue")
+            if self.binary_telemetry:
+                self.writeline("import struct")
+                self.writeline("import binascii")
             self.writeline("import json\n")
             
         elif self.MC_compile:
@@ -170,6 +279,9 @@ class CodeCompiler:
             self.writeline("import time")
             self.writeline("import sys")
             self.writeline("import _thread")
+            if self.binary_telemetry:
+                self.writeline("import struct")
+                self.writeline("import binascii")
             self.writeline("import json\n")
 
     def write_setup(self):
@@ -202,7 +314,7 @@ class CodeCompiler:
             self.writeline("GPIO.setmode(GPIO.BCM)\n")
             self.writeline("Devices_main = {")
             self.indent_level+=1
-            for dev_name, dev_info in Utils.devices['main_canvas'].items():
+            for dev_name, dev_info in self.used_devices.items():
                 #logging.debug(f"Compiling device: {dev_info['name']} (PIN: {dev_info['PIN']}, Type Index: {dev_info['type_index']})")
                 if dev_info['type_index'] == 0:
                     dev_type_str = "Output"
@@ -270,7 +382,7 @@ class CodeCompiler:
             self.writeline("data_lock = _thread.allocate_lock()  # Lock for synchronizing access to shared data if needed\n")   
             self.writeline("Devices_main = {")
             self.indent_level+=1
-            for dev_name, dev_info in Utils.devices['main_canvas'].items():
+            for dev_name, dev_info in self.used_devices.items():
                 #logging.debug(f"Compiling device: {dev_info['name']} (PIN: {dev_info['PIN']}, Type Index: {dev_info['type_index']})")
                 if dev_info['type_index'] == 0:
                     dev_type_str = "Output"
@@ -321,25 +433,33 @@ class CodeCompiler:
             self.writeline("dev_config['CurrentDutyCycle'] = 0")
             self.indent_level-=3
 
-        for block_id, block_info in Utils.main_canvas['blocks'].items():
-                if block_info['type'] == 'Button':
-                    self.btn_in_code = True
-                if 'LED' in block_info['type']:
-                    self.led_in_code = True
-        for func_id, func_info in Utils.functions.items():
-            for block_id, block_info in func_info['blocks'].items():
-                if block_info['type'] == 'Button':
-                    self.btn_in_code = True
-                if 'LED' in block_info['type']:
-                    self.led_in_code = True
+        self.write_pin_index()
+
+        # Helper classes are only emitted when a reachable block calls them
+        self.btn_in_code = 'Button' in self.reachable_types
+        self.led_in_code = any('LED' in block_type for block_type in self.reachable_types)
         if self.btn_in_code:
             self.create_btn_class()
         if self.led_in_code:
             self.create_led_class()
 
+    def write_pin_index(self):
+        """Emit devices_by_pin so the runtime helpers find a device in O(1) instead of scanning Devices_main"""
+        self.writeline("devices_by_pin = {}  # (PIN, type) -> device configs on that pin")
+        self.writeline("for dev_name, dev_config in Devices_main.items():")
+        self.indent_level += 1
+        self.writeline("devices_by_pin.setdefault((dev_config['PIN'], dev_config['type']), []).append(dev_config)")
+        self.indent_level -= 1
+
     def write_reporting_system(self):
         """Injects a background thread to report state via stdout"""
         self.writeline("\n# --- Real-time Reporting Thread ---")
+        if self.binary_telemetry:
+            self.write_frame_encoder()
+        if self.delta_telemetry:
+            self.write_delta_reporter()
+            self.writeline("# --------------------------------\n")
+            return
         self.writeline("def data_reporter():")
         self.indent_level += 1
         self.writeline("global last_report, reporter_running, printed_report")
@@ -376,13 +496,17 @@ class CodeCompiler:
         self.writeline("}")
         self.indent_level -= 1
         # 3. Print with Prefix (flush=True is critical for real-time SSH)
-        if self.GPIO_compile:
+        if self.binary_telemetry:
+            self.writeline("current_report_str = encode_report(report)")
+        elif self.GPIO_compile:
             self.writeline("current_report_str = json.dumps(report, sort_keys=True)")
         elif self.MC_compile:
             self.writeline("current_report_str = json.dumps(report)")
         self.writeline("if current_report_str != last_report:")
         self.indent_level += 1
-        if self.GPIO_compile:
+        if self.binary_telemetry:
+            self.writeline("print(current_report_str" + (", flush=True)" if self.GPIO_compile else ")"))
+        elif self.GPIO_compile:
             self.writeline("print('__REPORT__' + current_report_str, flush=True)")
         elif self.MC_compile:
             self.writeline("print('__REPORT__' + current_report_str)")
@@ -411,6 +535,119 @@ class CodeCompiler:
         # Start the thread
         self.writeline("# --------------------------------\n")
 
+    def write_frame_encoder(self):
+        """Emit encode_report(): a report dict as one base64 struct frame, see telemetry.py for the layout"""
+        self.writeline("DEVICE_TYPE_CODES = {'Output': 0, 'Input': 1, 'Button': 2, 'PWM': 3}")
+        self.writeline("DEVICE_STATE_CODES = {'LOW': 1, 'HIGH': 2}\n")
+        self.writeline("def pack_name(section, name):")
+        self.indent_level += 1
+        self.writeline("data = str(name).encode()[:255]")
+        self.writeline("return struct.pack('<BB', section, len(data)) + data")
+        self.indent_level -= 1
+        self.writeline("def pack_value(value):")
+        self.indent_level += 1
+        self.writeline("if value is None:")
+        self.indent_level += 1
+        self.writeline("return b'\\x00'")
+        self.indent_level -= 1
+        self.writeline("if value is False or value is True:")
+        self.indent_level += 1
+        self.writeline("return b'\\x02' if value else b'\\x01'")
+        self.indent_level -= 1
+        self.writeline("if isinstance(value, int) and -2147483648 <= value <= 2147483647:")
+        self.indent_level += 1
+        self.writeline("return struct.pack('<Bi', 3, value)")
+        self.indent_level -= 1
+        self.writeline("if isinstance(value, (int, float)):")
+        self.indent_level += 1
+        self.writeline("return struct.pack('<Bd', 4, value)")
+        self.indent_level -= 1
+        self.writeline("data = str(value).encode()[:65535]")
+        self.writeline("return struct.pack('<BH', 5, len(data)) + data")
+        self.indent_level -= 1
+        self.writeline("def encode_report(report):")
+        self.indent_level += 1
+        self.writeline("seq = report.get('seq', None)")
+        self.writeline("flags = (1 if report.get('full', True) else 0) | (0 if seq is None else 2)")
+        self.writeline("parts = [struct.pack('<BI', flags, seq or 0)]")
+        self.writeline("for k, v in report['variables'].items():")
+        self.indent_level += 1
+        self.writeline("parts.append(pack_name(0, k))")
+        self.writeline("parts.append(pack_value(v['value']))")
+        self.indent_level -= 1
+        self.writeline("for k, v in report['devices'].items():")
+        self.indent_level += 1
+        self.writeline("pin = v['PIN'] if isinstance(v['PIN'], int) else -1")
+        self.writeline("parts.append(pack_name(1, k))")
+        self.writeline("parts.append(struct.pack('<hBBf', pin, DEVICE_TYPE_CODES.get(v['type'], 255), DEVICE_STATE_CODES.get(v['state'], 0), v['value'] or 0))")
+        self.indent_level -= 1
+        self.writeline("body = binascii.b2a_base64(b''.join(parts))[:-1].decode()  # Drop the trailing newline")
+        self.writeline("return '\\x1eR' + ('%06x' % len(body)) + body")
+        self.indent_level -= 1
+        self.writeline("")
+
+    def write_delta_reporter(self):
+        """
+        Reporter that sends only the variables and devices whose value changed since
+        they were last sent, tagged with a sequence number. Every FULL_REPORT_TICKS
+        passes it sends everything (full=True) so a late or lossy reader resyncs.
+        """
+        flush = ", flush=True" if self.GPIO_compile else ""
+        self.writeline("def data_reporter():")
+        self.indent_level += 1
+        self.writeline("global reporter_running")
+        self.writeline("reporter_running = True")
+        self.writeline("sent = {}  # (section, name) -> value last sent for that key")
+        self.writeline("seq = 0")
+        self.writeline("ticks = 0")
+        self.writeline("time.sleep(1)  # Initial delay to allow main thread to set up")
+        self.writeline("while not shutdown:")
+        self.indent_level += 1
+        self.writeline("printed = False")
+        self.writeline("try:")
+        self.indent_level += 1
+        self.writeline("full = ticks == 0")
+        self.writeline(f"ticks = (ticks + 1) % {FULL_REPORT_TICKS}")
+        self.writeline("report = {'seq': seq, 'full': full, 'variables': {}, 'devices': {}}")
+        self.writeline("with data_lock:  # Ensure thread-safe access to shared data")
+        self.indent_level += 1
+        self.writeline("for k, v in Variables_main.items():")
+        self.indent_level += 1
+        self.writeline("value = v['value']")
+        self.writeline("if full or sent.get(('variables', k)) != value:")
+        self.indent_level += 1
+        self.writeline("report['variables'][k] = {'value': value}")
+        self.writeline("sent[('variables', k)] = value")
+        self.indent_level -= 2
+        self.writeline("for k, v in Devices_main.items():")
+        self.indent_level += 1
+        self.writeline("dev_type = v.get('type', '')")
+        self.writeline("state = v.get('state', None) if dev_type in ['Input', 'Output', 'Button'] else None")
+        self.writeline("value = v.get('CurrentDutyCycle', 0) if dev_type == 'PWM' else 0")
+        self.writeline("if full or sent.get(('devices', k)) != (state, value):")
+        self.indent_level += 1
+        self.writeline("report['devices'][k] = {'name': v.get('name', ''), 'PIN': v.get('PIN', ''), 'type': dev_type, 'state': state, 'value': value}")
+        self.writeline("sent[('devices', k)] = (state, value)")
+        self.indent_level -= 3
+        self.writeline("if full or report['variables'] or report['devices']:")
+        self.indent_level += 1
+        if self.binary_telemetry:
+            self.writeline(f"print(encode_report(report){flush})")
+        else:
+            self.writeline(f"print('__REPORT__' + json.dumps(report){flush})")
+        self.writeline("seq += 1")
+        self.writeline("printed = True")
+        self.indent_level -= 2
+        self.writeline("except Exception as e:")
+        self.indent_level += 1
+        self.writeline("print(f\"Error in reporter thread: {e}\")")
+        self.writeline("time.sleep(1)  # Sleep longer on error to avoid spamming")
+        self.indent_level -= 1
+        self.writeline("time.sleep(0.25 if printed else 0.1)")
+        self.indent_level -= 1
+        self.writeline("reporter_running = False  # Signal reporter thread is stopping")
+        self.indent_level -= 1
+
     def write_cleanup(self):
         self.writeline("\nexcept (KeyboardInterrupt, SystemExit):")
         self.indent_level += 1
@@ -454,6 +691,9 @@ class CodeCompiler:
     #MARK: Device Classes
     def create_btn_class(self):
         #logging.info("Creating Button class...")
+        if self.event_inputs:
+            self.create_event_btn_class()
+            return
         self.writeline("\nclass Button:")
         self.indent_level += 1
         self.writeline("def __init__(self):")
@@ -465,18 +705,14 @@ class CodeCompiler:
         if self.GPIO_compile:
             self.writeline("if GPIO.input(pin) == GPIO.HIGH:")
             self.indent_level += 1
-            self.writeline("for dev_name, dev_config in Devices_main.items():")
-            self.indent_level += 1
-            self.writeline("if dev_config['PIN'] == pin and dev_config['type'] == 'Button':")
+            self.writeline("for dev_config in devices_by_pin.get((pin, 'Button'), ()):")
             self.indent_level += 1
             self.writeline("dev_config['state'] = \"HIGH\"")
             self.writeline("return True")
-            self.indent_level -= 3
+            self.indent_level -= 2
             self.writeline("else:")
             self.indent_level += 1
-            self.writeline("for dev_name, dev_config in Devices_main.items():")
-            self.indent_level += 1
-            self.writeline("if dev_config['PIN'] == pin and dev_config['type'] == 'Button':")
+            self.writeline("for dev_config in devices_by_pin.get((pin, 'Button'), ()):")
             self.indent_level += 1
             self.writeline("dev_config['state'] = \"LOW\"")
             self.writeline("return False")
@@ -488,9 +724,7 @@ class CodeCompiler:
             self.indent_level += 1
             self.writeline("with data_lock:  # Ensure thread-safe updates to shared state")
             self.indent_level += 1
-            self.writeline("for dev_name, dev_config in Devices_main.items():")
-            self.indent_level += 1
-            self.writeline("if dev_config['PIN'] == pin and dev_config['type'] == 'Button':")
+            self.writeline("for dev_config in devices_by_pin.get((pin, 'Button'), ()):")
             self.indent_level += 1
             self.writeline("dev_config['state'] = \"HIGH\"")
             self.writeline("return True")
@@ -500,15 +734,133 @@ class CodeCompiler:
             self.indent_level += 1
             self.writeline("with data_lock:  # Ensure thread-safe updates to shared state")
             self.indent_level += 1
-            self.writeline("for dev_name, dev_config in Devices_main.items():")
-            self.indent_level += 1
-            self.writeline("if dev_config['PIN'] == pin and dev_config['type'] == 'Button':")
+            self.writeline("for dev_config in devices_by_pin.get((pin, 'Button'), ()):")
             self.indent_level += 1
             self.writeline("dev_config['state'] = \"LOW\"")
             self.writeline("return False")
         while self.indent_level > 0:
             self.indent_level -= 1
     
+    def create_event_btn_class(self):
+        """
+        Button class fed by edge interrupts: is_pressed reads the latched state, wait_for_event sleeps until an edge.
+        Button and Input devices are watched from the start; any other pin a Button block resolves to
+        (raw pin number, variable) is watched on first use, or read directly if it cannot take edge detection.
+        """
+        self.writeline("\nclass Button:")
+        self.indent_level += 1
+        self.writeline("def __init__(self):")
+        self.indent_level += 1
+        self.writeline("self.pressed = {}")
+        self.writeline("self.polled = set()  # Pins without edge detection, read on every check")
+        if self.GPIO_compile:
+            self.writeline("self.events = queue.Queue()")
+        if self.MC_compile:
+            self.writeline("self.events = []")
+        self.writeline("with data_lock:  # Ensure thread-safe updates to shared state")
+        self.indent_level += 1
+        self.writeline("for dev_name, dev_config in Devices_main.items():")
+        self.indent_level += 1
+        self.writeline("if dev_config['type'] in ('Button', 'Input') and dev_config['PIN'] not in self.pressed:")
+        self.indent_level += 1
+        self.writeline("self.watch(dev_config['PIN'])")
+        self.indent_level -= 4
+        self.writeline("def watch(self, pin):")
+        self.indent_level += 1
+        self.writeline("# Caller holds data_lock")
+        self.writeline("try:")
+        self.indent_level += 1
+        if self.GPIO_compile:
+            self.writeline("GPIO.add_event_detect(pin, GPIO.BOTH, callback=self.on_edge)")
+            self.writeline("self.latch(pin, GPIO.input(pin) == GPIO.HIGH)")
+            self.indent_level -= 1
+            self.writeline("except (RuntimeError, ValueError):")
+        if self.MC_compile:
+            self.writeline("pin_obj = hardware_map[pin]")
+            self.writeline("pin_obj.irq(trigger=machine.Pin.IRQ_RISING | machine.Pin.IRQ_FALLING, handler=lambda p, pin=pin: self.on_edge(pin))")
+            self.writeline("self.latch(pin, pin_obj.value() == 1)")
+            self.indent_level -= 1
+            self.writeline("except (KeyError, AttributeError, ValueError):")
+        self.indent_level += 1
+        self.writeline("self.polled.add(pin)")
+        self.indent_level -= 2
+        self.writeline("def on_edge(self, pin):")
+        self.indent_level += 1
+        if self.GPIO_compile:
+            self.writeline("# Runs on the RPi.GPIO callback thread; the level is re-read so bounces settle on the real state")
+            self.writeline("with data_lock:")
+            self.indent_level += 1
+            self.writeline("self.latch(pin, GPIO.input(pin) == GPIO.HIGH)")
+            self.indent_level -= 1
+            self.writeline("self.events.put(pin)")
+        if self.MC_compile:
+            self.writeline("# Soft IRQ: no data_lock here, the interrupted code may already hold it")
+            self.writeline("self.latch(pin, hardware_map[pin].value() == 1)")
+            self.writeline("if len(self.events) < 32:")
+            self.indent_level += 1
+            self.writeline("self.events.append(pin)")
+            self.indent_level -= 1
+        self.indent_level -= 1
+        self.writeline("def latch(self, pin, state):")
+        self.indent_level += 1
+        self.writeline("self.pressed[pin] = state")
+        self.writeline("for dev_config in devices_by_pin.get((pin, 'Button'), ()):")
+        self.indent_level += 1
+        self.writeline("dev_config['state'] = \"HIGH\" if state else \"LOW\"")
+        self.indent_level -= 2
+        self.writeline("def is_pressed(self, pin):")
+        self.indent_level += 1
+        self.writeline("if pin not in self.pressed and pin not in self.polled:")
+        self.indent_level += 1
+        self.writeline("with data_lock:")
+        self.indent_level += 1
+        self.writeline("self.watch(pin)")
+        self.indent_level -= 2
+        self.writeline("if pin in self.polled:")
+        self.indent_level += 1
+        if self.GPIO_compile:
+            self.writeline("state = GPIO.input(pin) == GPIO.HIGH")
+        if self.MC_compile:
+            self.writeline("state = pin in hardware_map and hardware_map[pin].value() == 1")
+        self.writeline("with data_lock:")
+        self.indent_level += 1
+        self.writeline("self.latch(pin, state)")
+        self.indent_level -= 1
+        self.writeline("return state")
+        self.indent_level -= 1
+        self.writeline("return self.pressed.get(pin, False)")
+        self.indent_level -= 1
+        self.writeline(f"def wait_for_event(self, timeout={EVENT_WAIT_TIMEOUT}):")
+        self.indent_level += 1
+        self.writeline("if self.polled:")
+        self.indent_level += 1
+        self.writeline(f"timeout = min(timeout, {POLLED_INPUT_INTERVAL})  # Polled pins raise no events")
+        self.indent_level -= 1
+        if self.GPIO_compile:
+            self.writeline("try:")
+            self.indent_level += 1
+            self.writeline("self.events.get(timeout=timeout)")
+            self.writeline("while True:  # Coalesce edges that arrived together")
+            self.indent_level += 1
+            self.writeline("self.events.get_nowait()")
+            self.indent_level -= 2
+            self.writeline("except queue.Empty:")
+            self.indent_level += 1
+            self.writeline("pass")
+        if self.MC_compile:
+            self.writeline("deadline = time.ticks_add(time.ticks_ms(), int(timeout * 1000))")
+            self.writeline("while True:")
+            self.indent_level += 1
+            self.writeline("# Swap the list out: an edge appended meanwhile lands in one of the two lists and is not lost")
+            self.writeline("events, self.events = self.events, []")
+            self.writeline("if events or time.ticks_diff(deadline, time.ticks_ms()) <= 0:")
+            self.indent_level += 1
+            self.writeline("return")
+            self.indent_level -= 1
+            self.writeline("machine.idle()  # Sleep the CPU until the next interrupt (pin edge, USB, timer tick)")
+        while self.indent_level > 0:
+            self.indent_level -= 1
+
     def create_led_class(self):
         #logging.info("Creating LED class...")
         self.writeline("\nclass LED:")
@@ -542,9 +894,7 @@ class CodeCompiler:
             self.indent_level += 1
             self.writeline("with data_lock:  # Ensure thread-safe updates to shared state")
             self.indent_level += 1
-            self.writeline("for dev_name, dev_config in Devices_main.items():")
-            self.indent_level += 1
-            self.writeline("if dev_config['PIN'] == pin and dev_config['type'] == 'Output':")
+            self.writeline("for dev_config in devices_by_pin.get((pin, 'Output'), ()):")
             self.indent_level += 1
             self.writeline("dev_config['state'] = \"LOW\"")
             self.writeline("GPIO.output(pin, GPIO.LOW)")
@@ -555,9 +905,7 @@ class CodeCompiler:
             self.indent_level += 1
             self.writeline("with data_lock:  # Ensure thread-safe updates to shared state")
             self.indent_level += 1
-            self.writeline("for dev_name, dev_config in Devices_main.items():")
-            self.indent_level += 1
-            self.writeline("if dev_config['PIN'] == pin and dev_config['type'] == 'Output':")
+            self.writeline("for dev_config in devices_by_pin.get((pin, 'Output'), ()):")
             self.indent_level += 1
             self.writeline("dev_config['state'] = \"HIGH\"")
             self.writeline("GPIO.output(pin, GPIO.HIGH)")
@@ -570,9 +918,7 @@ class CodeCompiler:
             self.indent_level += 1
             self.writeline("with data_lock:  # Ensure thread-safe updates to shared state")
             self.indent_level += 1
-            self.writeline("for dev_name, dev_config in Devices_main.items():")
-            self.indent_level += 1
-            self.writeline("if dev_config['PIN'] == pin and dev_config['type'] == 'Output':")
+            self.writeline("for dev_config in devices_by_pin.get((pin, 'Output'), ()):")
             self.indent_level += 1
             self.writeline("dev_config['state'] = \"LOW\"")
             self.writeline("pin_obj.value(0)")
@@ -583,9 +929,7 @@ class CodeCompiler:
             self.indent_level += 1
             self.writeline("with data_lock:  # Ensure thread-safe updates to shared state")
             self.indent_level += 1
-            self.writeline("for dev_name, dev_config in Devices_main.items():")
-            self.indent_level += 1
-            self.writeline("if dev_config['PIN'] == pin and dev_config['type'] == 'Output':")
+            self.writeline("for dev_config in devices_by_pin.get((pin, 'Output'), ()):")
             self.indent_level += 1
             self.writeline("dev_config['state'] = \"HIGH\"")
             self.writeline("pin_obj.value(1)")
@@ -600,9 +944,7 @@ class CodeCompiler:
             self.indent_level += 1
             self.writeline("with data_lock:  # Ensure thread-safe updates to shared state")
             self.indent_level += 1
-            self.writeline("for dev_name, dev_config in Devices_main.items():")
-            self.indent_level += 1
-            self.writeline("if dev_config['PIN'] == pin and dev_config['type'] == 'Output':")
+            self.writeline("for dev_config in devices_by_pin.get((pin, 'Output'), ()):")
             self.indent_level += 1
             self.writeline("dev_config['state'] = \"HIGH\"")
             self.writeline("GPIO.output(pin, GPIO.HIGH)")
@@ -613,9 +955,7 @@ class CodeCompiler:
             self.writeline("pin_obj = hardware_map[pin]")
             self.writeline("with data_lock:  # Ensure thread-safe updates to shared state")
             self.indent_level += 1
-            self.writeline("for dev_name, dev_config in Devices_main.items():")
-            self.indent_level += 1
-            self.writeline("if dev_config['PIN'] == pin and dev_config['type'] == 'Output':")
+            self.writeline("for dev_config in devices_by_pin.get((pin, 'Output'), ()):")
             self.indent_level += 1
             self.writeline("dev_config['state'] = \"HIGH\"")
             self.writeline("pin_obj.value(1)")
@@ -630,9 +970,7 @@ class CodeCompiler:
             self.indent_level += 1
             self.writeline("with data_lock:  # Ensure thread-safe updates to shared state")
             self.indent_level += 1
-            self.writeline("for dev_name, dev_config in Devices_main.items():")
-            self.indent_level += 1
-            self.writeline("if dev_config['PIN'] == pin and dev_config['type'] == 'Output':")
+            self.writeline("for dev_config in devices_by_pin.get((pin, 'Output'), ()):")
             self.indent_level += 1
             self.writeline("dev_config['state'] = \"LOW\"")
             self.writeline("GPIO.output(pin, GPIO.LOW)")
@@ -643,9 +981,7 @@ class CodeCompiler:
             self.writeline("pin_obj = hardware_map[pin]")
             self.writeline("with data_lock:  # Ensure thread-safe updates to shared state")
             self.indent_level += 1
-            self.writeline("for dev_name, dev_config in Devices_main.items():")
-            self.indent_level += 1
-            self.writeline("if dev_config['PIN'] == pin and dev_config['type'] == 'Output':")
+            self.writeline("for dev_config in devices_by_pin.get((pin, 'Output'), ()):")
             self.indent_level += 1
             self.writeline("dev_config['state'] = \"LOW\"")
             self.writeline("pin_obj.value(0)")
@@ -658,9 +994,7 @@ class CodeCompiler:
         if self.GPIO_compile:
             self.writeline("if pin in self.pin_state and self.pin_state[pin] == GPIO.HIGH:")
             self.indent_level += 1
-            self.writeline("for dev_name, dev_config in Devices_main.items():")
-            self.indent_level += 1
-            self.writeline("if dev_config['PIN'] == pin and dev_config['type'] == 'Output':")
+            self.writeline("for dev_config in devices_by_pin.get((pin, 'Output'), ()):")
             self.indent_level += 1
             self.writeline("with data_lock:  # Ensure thread-safe updates to shared state")
             self.indent_level += 1
@@ -680,9 +1014,7 @@ class CodeCompiler:
                 self.indent_level -= 1
             self.writeline("elif pin in self.pin_state and self.pin_state[pin] == GPIO.LOW:")
             self.indent_level += 1
-            self.writeline("for dev_name, dev_config in Devices_main.items():")
-            self.indent_level += 1
-            self.writeline("if dev_config['PIN'] == pin and dev_config['type'] == 'Output':")
+            self.writeline("for dev_config in devices_by_pin.get((pin, 'Output'), ()):")
             self.indent_level += 1
             self.writeline("with data_lock:  # Ensure thread-safe updates to shared state")
             self.indent_level += 1
@@ -704,9 +1036,7 @@ class CodeCompiler:
             self.writeline("pin_obj = hardware_map[pin]")
             self.writeline("if self.pin_state[pin] == 1:")
             self.indent_level += 1
-            self.writeline("for dev_name, dev_config in Devices_main.items():")
-            self.indent_level += 1
-            self.writeline("if dev_config['PIN'] == pin and dev_config['type'] == 'Output':")
+            self.writeline("for dev_config in devices_by_pin.get((pin, 'Output'), ()):")
             self.indent_level += 1
             self.writeline("with data_lock:  # Ensure thread-safe updates to shared state")
             self.indent_level += 1
@@ -726,9 +1056,7 @@ class CodeCompiler:
                 self.indent_level -= 1
             self.writeline("elif self.pin_state[pin] == 0:")
             self.indent_level += 1
-            self.writeline("for dev_name, dev_config in Devices_main.items():")
-            self.indent_level += 1
-            self.writeline("if dev_config['PIN'] == pin and dev_config['type'] == 'Output':")
+            self.writeline("for dev_config in devices_by_pin.get((pin, 'Output'), ()):")
             self.indent_level += 1
             self.writeline("with data_lock:  # Ensure thread-safe updates to shared state")
             self.indent_level += 1
@@ -750,9 +1078,7 @@ class CodeCompiler:
         self.writeline("def PWM_LED(self, pin, PWM_value):")
         self.indent_level += 1
         if self.GPIO_compile:
-            self.writeline("for dev_name, dev_config in Devices_main.items():")
-            self.indent_level += 1
-            self.writeline("if dev_config['PIN'] == pin and dev_config['type'] == 'PWM':")
+            self.writeline("for dev_config in devices_by_pin.get((pin, 'PWM'), ()):")
             self.indent_level += 1
             self.writeline("with data_lock:  # Ensure thread-safe updates to shared state")
             self.indent_level += 1
@@ -762,9 +1088,7 @@ class CodeCompiler:
             self.indent_level -= 1
             self.writeline("time.sleep(0.05)")
         if self.MC_compile:
-            self.writeline("for dev_name, dev_config in Devices_main.items():")
-            self.indent_level += 1
-            self.writeline("if dev_config['PIN'] == pin and dev_config['type'] == 'PWM':")
+            self.writeline("for dev_config in devices_by_pin.get((pin, 'PWM'), ()):")
             self.indent_level += 1
             self.writeline("if pin in hardware_map:")
             self.indent_level += 1
@@ -782,200 +1106,256 @@ class CodeCompiler:
         #RGB method
         self.writeline("def RGB_LED(self, pin_r, pin_g, pin_b, r_value, g_value, b_value):")
         self.indent_level += 1
+        self.writeline("with data_lock:  # Ensure thread-safe access to shared state")
+        self.indent_level += 1
+        self.writeline("# Red is assigned last so it wins when channels share a pin")
+        self.writeline("channels = {pin_b: b_value, pin_g: g_value, pin_r: r_value}")
+        self.writeline("for pin, value in channels.items():")
+        self.indent_level += 1
+        self.writeline("for dev_config in devices_by_pin.get((pin, 'PWM'), ()):")
+        self.indent_level += 1
         if self.GPIO_compile:
-            self.writeline("with data_lock:  # Ensure thread-safe access to shared state")
-            self.indent_level += 1
-            self.writeline("for def_name, dev_config in Devices_main.items():")
-            self.indent_level += 1
-            self.writeline("if dev_config['PIN'] in [pin_r, pin_g, pin_b] and dev_config['type'] == 'PWM':")
-            self.indent_level += 1
-            self.writeline("if dev_config['PIN'] == pin_r:")
-            self.indent_level += 1
-            self.writeline("dev_config['PWM_instance'].ChangeDutyCycle(r_value)")
-            self.writeline("dev_config['CurrentDutyCycle'] = r_value")
-            self.indent_level -= 1
-            self.writeline("elif dev_config['PIN'] == pin_g:")
-            self.indent_level += 1
-            self.writeline("dev_config['PWM_instance'].ChangeDutyCycle(g_value)")
-            self.writeline("dev_config['CurrentDutyCycle'] = g_value")
-            self.indent_level -= 1
-            self.writeline("elif dev_config['PIN'] == pin_b:")
-            self.indent_level += 1
-            self.writeline("dev_config['PWM_instance'].ChangeDutyCycle(b_value)")
-            self.writeline("dev_config['CurrentDutyCycle'] = b_value")
+            self.writeline("dev_config['PWM_instance'].ChangeDutyCycle(value)")
+            self.writeline("dev_config['CurrentDutyCycle'] = value")
         if self.MC_compile:
-            self.writeline("with data_lock:  # Ensure thread-safe access to shared state")
-            self.indent_level += 1
-            self.writeline("for dev_name, dev_config in Devices_main.items():")
-            self.indent_level += 1
-            self.writeline("if dev_config['PIN'] in [pin_r, pin_g, pin_b] and dev_config['type'] == 'PWM':")
-            self.indent_level += 1
-            self.writeline("if dev_config['PIN'] == pin_r:")
-            self.indent_level += 1
-            self.writeline("if pin_r in hardware_map:")
-            self.indent_level += 1
-            self.writeline("hardware_map[pin_r].duty_u16(int(r_value * 655.35))")
-            self.writeline("dev_config['CurrentDutyCycle'] = r_value")
-            self.indent_level -= 2
-            self.writeline("elif dev_config['PIN'] == pin_g:")
-            self.indent_level += 1
-            self.writeline("if pin_g in hardware_map:")
-            self.indent_level += 1
-            self.writeline("hardware_map[pin_g].duty_u16(int(g_value * 655.35))")
-            self.writeline("dev_config['CurrentDutyCycle'] = g_value")
-            self.indent_level -= 2
-            self.writeline("elif dev_config['PIN'] == pin_b:")
-            self.indent_level += 1
-            self.writeline("if pin_b in hardware_map:")
+            self.writeline("if pin in hardware_map:")
             self.indent_level += 1
-            self.writeline("hardware_map[pin_b].duty_u16(int(b_value * 655.35))")
-            self.writeline("dev_config['CurrentDutyCycle'] = b_value")
+            self.writeline("hardware_map[pin].duty_u16(int(value * 655.35))")
+            self.writeline("dev_config['CurrentDutyCycle'] = value")
         while self.indent_level > 0:
             self.indent_level -= 1
 
 
+    #MARK: Compile Cache
+    def hash_canvases(self):
+        """Content hashes of the main canvas, every reachable function canvas and the main symbols.
+
+        Only blocks reachable from each Start (and the paths leaving them) are serialized,
+        so unused functions and loose blocks cost nothing per compile.
+        """
+        main_vars = self.cache_symbols(Utils.variables['main_canvas'])
+        main_devs = self.cache_symbols(Utils.devices['main_canvas'])
+        canvases = {'main_canvas': self.content_hash(*self.reachable_graph('canvas', Utils.main_canvas), main_vars, main_devs)}
+        for func_id in self.reachable_functions:
+            func_info = Utils.functions[func_id]
+            canvases[func_id] = self.content_hash(
+                func_info.get('name'), *self.reachable_graph(func_id, func_info),
+                self.cache_symbols(Utils.variables['function_canvases'].get(func_id, {})),
+                self.cache_symbols(Utils.devices['function_canvases'].get(func_id, {}))
+            )
+        return {
+            'canvases': canvases,
+            'symbols': self.content_hash(main_vars, main_devs),
+        }
+
+    def reachable_graph(self, canvas_key, canvas_info):
+        """Blocks analyze_reachability reached on a canvas and the paths leaving them, in canvas order"""
+        reached = self.reachable_blocks.get(canvas_key, set())
+        blocks = {b_id: b_info for b_id, b_info in canvas_info.get('blocks', {}).items() if b_id in reached}
+        paths = {p_id: p_info for p_id, p_info in canvas_info.get('paths', {}).items() if str(p_info.get('from')) in reached}
+        return blocks, paths
+
+    def cache_symbols(self, symbols):
+        """Keep only the variable/device fields the compiler reads"""
+        return [(s_id, s_info.get('name'), s_info.get('type'), s_info.get('type_index'), s_info.get('PIN'), s_info.get('value'))
+                for s_id, s_info in symbols.items()]
+
+    def strip_runtime(self, data):
+        """Drop Qt objects and layout-only fields so hashes only change with the program"""
+        if isinstance(data, dict):
+            return {k: self.strip_runtime(v) for k, v in data.items() if k not in CACHE_IGNORED_KEYS}
+        if isinstance(data, (list, tuple)):
+            return [self.strip_runtime(v) for v in data]
+        return data
+
+    def content_hash(self, *parts):
+        """Stable hash of JSON-serialized data, insertion order preserved (it affects traversal order)"""
+        hasher = hashlib.sha1()
+        for part in parts:
+            hasher.update(json.dumps(self.strip_runtime(part), default=str).encode('utf-8'))
+            hasher.update(b'\0')
+        return hasher.hexdigest()
+
     #MARK: Helper Methods
 
-    def create_hashmap(self):
-        self.hashmap = {}
-        for block_id, block_info in Utils.main_canvas['blocks'].items():
+    def create_adjacency_index(self):
+        """Build per-canvas lookup tables so graph traversal is O(1) per step"""
+        self.adjacency = {'canvas': self.build_canvas_index(Utils.main_canvas)}
+        for func_id, func_info in Utils.functions.items():
+            self.adjacency[func_id] = self.build_canvas_index(func_info)
+
+    def build_canvas_index(self, canvas_info):
+        """Index one canvas: first successor, (block_id, output circle) -> target and first block per type"""
+        blocks = canvas_info.get('blocks', {})
+        paths = canvas_info.get('paths', {})
+        conn_targets = {}
+        by_type = {}
+        for block_id, block_info in blocks.items():
+            by_type.setdefault(block_info['type'], block_info)
+            for conn_id in block_info.get('in_connections', {}).keys():
+                conn_targets.setdefault(conn_id, block_id)  # First block holding the connection wins
+        next_block = {}
+        outputs = {}
+        successors = {}
+        for block_id, block_info in blocks.items():
             for conn_id in block_info.get('out_connections', {}).keys():
-                self.hashmap[conn_id] = conn_id.split('-')[1]  # Map connection ID to block ID
-        for func_name, func_info in Utils.functions.items():
-            for block_id, block_info in func_info.get('blocks', {}).items():
-                for conn_id in block_info.get('out_connections', {}).keys():
-                    self.hashmap[conn_id] = conn_id.split('-')[1]  # Map connection ID to block ID
+                next_block.setdefault(block_id, conn_id.split('-')[1])  # Connection ID is "<from>-<to>"
+                conn_info = paths.get(conn_id)
+                if conn_info and conn_id in conn_targets:
+                    outputs.setdefault((block_id, conn_info['from_circle_type']), conn_targets[conn_id])
+                for target in (conn_id.split('-')[1], conn_targets.get(conn_id)):
+                    if target in blocks:
+                        successors.setdefault(block_id, []).append(target)
+        return {'next': next_block, 'outputs': outputs, 'successors': successors, 'types': by_type}
+
+    #MARK: Reachability
+    def analyze_reachability(self):
+        """Walk every connection from Start before emission.
+
+        Collects the block types and functions the program can reach and the
+        main-canvas devices its blocks name, so unused functions, device setup
+        and helper classes are left out of the generated file. Following every
+        output (not just the ones a handler emits) keeps this a safe superset.
+        """
+        self.reachable_types = set()
+        self.reachable_functions = []
+        self.reachable_blocks = {}  # Canvas key -> ids of the blocks reached from its Start
+        referenced_names = set()
+        functions_by_name = {}
+        for func_id, func_info in Utils.functions.items():
+            functions_by_name.setdefault(func_info['name'], []).append(func_id)
+
+        canvases = ['canvas']
+        seen_canvases = {'canvas'}
+        while canvases:
+            canvas_key = canvases.pop()
+            index = self.adjacency[canvas_key]
+            blocks = Utils.main_canvas['blocks'] if canvas_key == 'canvas' else Utils.functions[canvas_key]['blocks']
+            start_block = index['types'].get('Start')
+            if not start_block:
+                continue
+            pending = [start_block['id']]
+            visited = self.reachable_blocks[canvas_key] = set(pending)
+            while pending:
+                block = blocks[pending.pop()]
+                self.reachable_types.add(block['type'])
+                if canvas_key == 'canvas':
+                    referenced_names.update(self.block_operands(block))
+                if block['type'] == 'Function':
+                    for func_id in functions_by_name.get(block.get('name'), []):
+                        if func_id not in seen_canvases:
+                            seen_canvases.add(func_id)
+                            canvases.append(func_id)
+                            self.reachable_functions.append(func_id)
+                for target in index['successors'].get(block['id'], []):
+                    if target not in visited:
+                        visited.add(target)
+                        pending.append(target)
+
+        # Device arguments of function calls resolve on the main canvas, so only its blocks decide
+        self.used_devices = {dev_id: dev_info for dev_id, dev_info in Utils.devices['main_canvas'].items()
+                             if dev_info['name'] in referenced_names}
+
+    def block_operands(self, block):
+        """Every name a block may resolve as a variable or device"""
+        names = [block.get(key) for key in ('value_1_name', 'value_2_name', 'result_var_name', 'return_var_name', 'PWM_value')]
+        for key in ('first_vars', 'second_vars'):
+            names.extend((block.get(key) or {}).values())
+        for key, group in (('internal_vars', 'main_vars'), ('internal_devs', 'main_devs')):
+            names.extend(info.get('name') for info in (block.get(key) or {}).get(group, {}).values())
+        return [name for name in names if isinstance(name, str)]
+
+    def loop_waits_for_input(self, body_id):
+        """True when a loop body reads a button and only sets outputs from what it reads.
+
+        Re-running such a body without a new edge writes the same values again,
+        so the loop can block on btn.wait_for_event() instead of spinning.
+        """
+        if not body_id:
+            return False
+        successors = self.current_index()['successors']
+        blocks = Utils.main_canvas['blocks'] if self.compiling_what == 'canvas' else Utils.functions[self.compiling_function]['blocks']
+        types = set()
+        pending = [body_id]
+        visited = {body_id}
+        while pending:
+            block_id = pending.pop()
+            block_type = blocks[block_id]['type']
+            # An End inside a function body hands emission back to the main canvas
+            if block_type not in EVENT_IDLE_TYPES or (block_type == 'End' and self.compiling_what == 'function'):
+                return False
+            types.add(block_type)
+            for target in successors.get(block_id, []):
+                if target not in visited:
+                    visited.add(target)
+                    pending.append(target)
+        return 'Button' in types
+
+    def current_index(self):
+        """Adjacency index of the canvas currently being compiled"""
+        if self.compiling_what == 'function':
+            return self.adjacency[self.compiling_function]
+        return self.adjacency['canvas']
 
     def find_block_by_type(self, block_type):
         """Find first block of given type"""
-        if self.compiling_what == 'canvas':
-            search_infos = Utils.main_canvas['blocks']
-        elif self.compiling_what == 'function':
-            search_infos = Utils.functions[self.compiling_function]['blocks']
-        for block_id, block_info in search_infos.items():
-            if block_info['type'] == block_type:
-                return block_info
-        return None
+        return self.current_index()['types'].get(block_type)
     
     def get_next_block(self, current_block_id):
-        #logging.info(f"Hashmap for connections: {self.hashmap}")
         """Get the block connected to output of current block"""
-        #logging.debug(f"Getting next block from {current_block_id}")
-        if self.compiling_what == 'canvas':
-            #logging.debug(f"Searching in main canvas blocks")
-            current_info = Utils.main_canvas['blocks'][current_block_id]
-        elif self.compiling_what == 'function':
-            #logging.debug(f"Searching in function canvas blocks for function {self.compiling_function}")
-            current_info = Utils.functions[self.compiling_function]['blocks'][current_block_id]
-        
-        # Get first out_connection
-        if current_info['out_connections']:
-            #logging.debug(f"Current block out_connections: {current_info['out_connections']}")
-            for conn_id in current_info['out_connections'].keys():
-                #logging.debug(f"Checking connection ID: {conn_id}")
-                if conn_id in self.hashmap:
-                    next_block_id = self.hashmap[conn_id]
-                    #logging.debug(f"Next block ID: {next_block_id}")
-                    return next_block_id
-        return None 
+        return self.current_index()['next'].get(current_block_id)
     
     def get_next_block_from_output(self, current_block_id, output_circle):
         """Get the block connected to specific output circle of current block"""
-        if self.compiling_what == 'canvas':
-            current_info = Utils.main_canvas['blocks'][current_block_id]
-            path_info = Utils.main_canvas['paths']
-            #logging.debug(f"Current block info: {current_info}")
-        elif self.compiling_what == 'function':
-            current_info = Utils.functions[self.compiling_function]['blocks'][current_block_id]
-            path_info = Utils.functions[self.compiling_function]['paths']
-            #logging.debug(f"Current block info: {current_info}")
-
-        # Find connection from specified output circle
-
-        for conn_id in current_info['out_connections'].keys():
-            #logging.debug(f"Utils.paths: {path_info}")
-            conn_info = path_info.get(conn_id)
-            #logging.debug(f"Checking connection ID: {conn_id} with info: {conn_info}")
-            if conn_info and conn_info['from_circle_type'] == output_circle:
-                # Find which block this connection goes to 
-                #logging.debug(f"Getting next block from output circle '{output_circle}' of block {current_block_id}")
-                if self.compiling_what == 'canvas':
-                    #logging.info(f"Searching in main canvas blocks")
-                    search_infos = Utils.main_canvas['blocks']
-                elif self.compiling_what == 'function':
-                    #loggin.info(f"Searching in function canvas blocks for function {self.compiling_function}")
-                    search_infos = Utils.functions[self.compiling_function]['blocks']
-                for block_id, info in search_infos.items():
-                    if conn_id in info['in_connections']:
-                        #logging.info(f"Next block is {block_id}")
-                        return block_id
-        return None
+        return self.current_index()['outputs'].get((current_block_id, output_circle))
     
+    def create_symbol_tables(self):
+        """Map (kind, name) -> (kind, scope, emitted expression) for the main canvas and each function"""
+        self.symbols = {'canvas': {}}
+        for var_info in Utils.variables['main_canvas'].values():
+            self.add_symbol('canvas', 'Variable', var_info['name'], f"Variables_main['{var_info['name']}']['value']")
+        for dev_info in Utils.devices['main_canvas'].values():
+            self.add_symbol('canvas', 'Device', dev_info['name'], f"Devices_main['{dev_info['name']}']['PIN']")
+        for func_id in Utils.functions.keys():
+            self.symbols[func_id] = {}
+            # Inside a function, variables and devices are plain parameters
+            for var_info in Utils.variables['function_canvases'].get(func_id, {}).values():
+                self.add_symbol(func_id, 'Variable', var_info['name'], f"{var_info['name']}")
+            for dev_info in Utils.devices['function_canvases'].get(func_id, {}).values():
+                self.add_symbol(func_id, 'Device', dev_info['name'], f"{dev_info['name']}")
+
+    def add_symbol(self, scope, kind, name, expression):
+        """Register a symbol unless its name reads as a number (numbers always stay literals)"""
+        if self.is_variable_reference(name):
+            self.symbols[scope].setdefault((kind, name), (kind, scope, expression))
+
+    def current_symbols(self):
+        """Symbol table of the canvas currently being compiled"""
+        if self.compiling_what == 'function':
+            return self.symbols[self.compiling_function]
+        return self.symbols['canvas']
+
     def resolve_value(self, value_str, value_type):
         """Convert value to actual value - handle variable or literal"""
         if value_type in ('switch', 'N/A'):
-            #logging.debug(f"Resolving value: {value_str}")
             return value_str  # Return as is for switch
-        
-        if self.is_variable_reference(value_str):
-            #logging.debug(f"Resolving variable reference: {value_str}")
-            # Look up variable's current runtime value
-            if value_type == 'Device':
-                #moggin.info(f"Looking up device: {value_str}")
-                #logging.debug(f"Utils.devices: {Utils.devices}")
-                if self.compiling_what == 'canvas':
-                    #logging.info(f"Searching in main canvas devices")
-                    search_devices = Utils.devices['main_canvas']
-                elif self.compiling_what == 'function':
-                    #logging.info(f"Searching in function canvas devices for function {self.compiling_function}")
-                    search_devices = Utils.devices['function_canvases'][self.compiling_function]
-                #logging.debug(f"Devices to search: {search_devices}")
-                if self.compiling_what == 'canvas':
-                    for dev_id, dev_info in search_devices.items():
-                        #logging.debug(dev_info)
-                        if dev_info['name'] == value_str:
-                            #logging.debug(f"Found device {value_str} with PIN {dev_info['PIN']}")
-                            return f"Devices_main['{value_str}']['PIN']"
-                elif self.compiling_what == 'function':
-                    return f"{value_str}"
-            elif value_type == 'Variable':
-                #logging.info(f"Looking up variable: {value_str}")
-                #logging.debug(f"Utils.variables: {Utils.variables}")
-                if self.compiling_what == 'canvas':
-                    #logging.info(f"Searching in main canvas variables")
-                    search_variables = Utils.variables['main_canvas']
-                elif self.compiling_what == 'function':
-                    #logging.debug(f"Searching in function canvas variables for function {self.compiling_function}")
-                    search_variables = Utils.variables['function_canvases'][self.compiling_function]
-                #logging.debug(f"Variables to search: {search_variables}")
-                if self.compiling_what == 'canvas':
-                    for var_id, var_info in search_variables.items():
-                        #logging.debug(var_info)
-                        if var_info['name'] == value_str:
-                            #logging.debug(f"Found variable {value_str} with value {var_info['value']}")
-                            return f"Variables_main['{value_str}']['value']"
-                elif self.compiling_what == 'function':
-                    return f"{value_str}"
-                
-        else:
-            #logging.info(f"Using literal value: {value_str}")
-            pass
+        symbol = self.current_symbols().get((value_type, value_str))
+        if symbol:
+            return symbol[2]  # Emitted expression for the variable/device
         return value_str  # It's a literal
     
     def is_variable_reference(self, value_str):
         """Check if value is a variable name (not a number)"""
         try:
             float(value_str)  # Can convert to number?
-            #logging.debug(f"{value_str} is a literal number.")
             return False      # It's a literal number
-        except ValueError:
-            #logging.info(f"{value_str} is a variable reference.")
+        except (TypeError, ValueError):
             return True 
         
     def writeline(self, text):
         """Write indented line"""
         indent = self.indent_str * self.indent_level
-        self.current_lines.append(indent + text + "\n")
+        self.current_out.write(indent + text + "\n")
         
     def write_condition(self, type,  value1, operator, value2):
         """Write condition code - DRY principle"""
@@ -1028,20 +1408,20 @@ class CodeCompiler:
 
         self.write_condition("if", first_values[0], operators[0], second_values[0])
         self.indent_level += 1
-        self.process_block(outputs[0])
+        yield outputs[0]
         #logging.info(f"Completed If true branch, now handling else branch")
         self.indent_level -= 1
         for i in range(1, block['conditions']):
             self.write_condition("elif", first_values[i], operators[i], second_values[i])
             self.indent_level += 1
-            self.process_block(outputs[i])
+            yield outputs[i]
             #logging.info(f"Completed Elif branch {i}, now checking next condition or else")
             self.indent_level -= 1
         if len(outputs) > block['conditions']:
             self.writeline("else:")
             #logging.info(f"Processing else branch for If block")
             self.indent_level += 1
-            self.process_block(outputs[-1])
+            yield outputs[-1]
             self.indent_level -= 1
     
     def handle_while_block(self, block):
@@ -1051,7 +1431,10 @@ class CodeCompiler:
             self.writeline("while True:")
             self.indent_level += 1
             #logging.info(f"Processing While true branch for While true block")
-            self.process_block(next_id)
+            idle_on_input = self.event_inputs and self.loop_waits_for_input(next_id)
+            yield next_id
+            if idle_on_input:
+                self.writeline("btn.wait_for_event()  # Body only mirrors inputs, nothing changes until an edge")
             self.indent_level -= 1
             return
         
@@ -1066,10 +1449,10 @@ class CodeCompiler:
         self.write_condition("while", value_1, operator, value_2)
         self.indent_level += 1
         #logging.info(f"Processing While true branch for While block")
-        self.process_block(out1_id)
+        yield out1_id
         self.indent_level -= 1
         #logging.info(f"Processing While false branch for While block")
-        self.process_block(out2_id)
+        yield out2_id
            
     def handle_timer_block(self, block):
         self.writeline(f"time.sleep({block['sleep_time']}/1000)")
@@ -1078,7 +1461,7 @@ class CodeCompiler:
         if next_id:
             #logging.info(f"Processing next block after Timer: {next_id}")
             pass
-        self.process_block(next_id)
+        yield next_id
     
     def handle_switch_block(self, block):
         switch_state = block['switch_state']
@@ -1117,34 +1500,43 @@ class CodeCompiler:
         if next_id:
             #logging.info(f"Processing next block after Switch: {next_id}")
             pass
-        self.process_block(next_id)
+        yield next_id
     
     def handle_button_block(self, block):
         DEV_1 = self.resolve_value(block['value_1_name'], block['value_1_type'])
         out1_id = self.get_next_block_from_output(block['id'], 'out_1')  # ON path
         out2_id = self.get_next_block_from_output(block['id'], 'out_2')
         #logging.debug(f"Resolved Button block device: {DEV_1}")
-        if self.GPIO_compile:
+        if self.event_inputs:
+            self.writeline(f"if btn.is_pressed({DEV_1}):")
+            self.indent_level += 1
+            yield out1_id
+            self.indent_level -= 1
+            self.writeline("else:")
+            self.indent_level += 1
+            yield out2_id
+            self.indent_level -= 1
+        elif self.GPIO_compile:
             self.writeline(f"if Button().is_pressed({DEV_1}):")
             self.indent_level += 1
             #logging.debug(f"Processing Button ON branch for Button block")
-            self.process_block(out1_id)
+            yield out1_id
             self.indent_level -= 1
             self.writeline("else:")
             #logging.debug(f"Processing Button OFF branch for Button block")
             self.indent_level += 1
-            self.process_block(out2_id)
+            yield out2_id
             self.indent_level -= 1
         elif self.MC_compile:
             self.writeline(f"if Button().is_pressed({DEV_1}):")
             self.indent_level += 1
             #logging.debug(f"Processing Button ON branch for Button block")
-            self.process_block(out1_id)
+            yield out1_id
             self.indent_level -= 1
             self.writeline("else:")
             #logging.debug(f"Processing Button OFF branch for Button block")
             self.indent_level += 1
-            self.process_block(out2_id)
+            yield out2_id
             self.indent_level -= 1
             
     def handle_function_block(self, block):
@@ -1158,31 +1550,44 @@ class CodeCompiler:
                     self.func_to_compile[f_id] = (f_info[0], "Compiled", "")
                     self.memory_indent_level = self.indent_level
                     self.indent_level = 0  # Reset indent for function definition
-                    self.current_lines = self.function_lines
-                    self.writeline("")  # Blank line before function
-                    self.writeline(f"def {func_name}(")
-                    self.indent_level += 1
-                    #logging.debug(f"ref_vars: {block['internal_vars']['ref_vars']}")
-                    #logging.debug(f"ref_devs: {block['internal_devs']['ref_devs']}")
-                    for l_widget, v_info in block['internal_vars']['ref_vars'].items():
-                        #logging.debug(f"Function variable parameter: {v_info['name']}")
-                        self.writeline(f"{v_info['name']},")
-                    for l_widget, d_info in block['internal_devs']['ref_devs'].items():
-                        #logging.debug(f"Function device parameter: {d_info['name']}")
-                        self.writeline(f"{d_info['name']},")
-                    self.indent_level -= 1
-                    self.writeline("):")
-                    self.indent_level += 1
-                    self.compiling_what = 'function'
+                    self.current_out = self.function_out
                     for fu_id, fu_info in Utils.functions.items():
                         #logging.debug(f"{f_id}: {f_info}")
                         if fu_info['name'] == func_name:
                             self.compiling_function = fu_info['id']
                             break
-                    start_block = self.find_block_by_type('Start')
-                    if start_block:
-                        next_id = self.get_next_block(start_block['id'])
-                        self.process_block(next_id)
+                    params = ([v_info['name'] for v_info in block['internal_vars']['ref_vars'].values()],
+                              [d_info['name'] for d_info in block['internal_devs']['ref_devs'].values()])
+                    function_key = self.content_hash(self.compile_mode, self.btn_in_code, self.led_in_code,
+                                                     self.function_hashes.get(fu_id), params)
+                    cached = self.compile_cache.get(('function', fu_id))
+                    if cached and cached['key'] == function_key:
+                        # Unchanged since the last compile: replay its definition instead of walking its canvas
+                        self.function_out.write(cached['text'])
+                        self.func_to_compile[f_id] = (f_info[0], "Compiled", cached['return_value'])
+                        self.compiling_what = 'function'
+                        yield from self.leave_function()
+                    else:
+                        self.open_functions.append((fu_id, function_key, block, self.function_out.tell()))
+                        self.writeline("")  # Blank line before function
+                        self.writeline(f"def {func_name}(")
+                        self.indent_level += 1
+                        #logging.debug(f"ref_vars: {block['internal_vars']['ref_vars']}")
+                        #logging.debug(f"ref_devs: {block['internal_devs']['ref_devs']}")
+                        for l_widget, v_info in block['internal_vars']['ref_vars'].items():
+                            #logging.debug(f"Function variable parameter: {v_info['name']}")
+                            self.writeline(f"{v_info['name']},")
+                        for l_widget, d_info in block['internal_devs']['ref_devs'].items():
+                            #logging.debug(f"Function device parameter: {d_info['name']}")
+                            self.writeline(f"{d_info['name']},")
+                        self.indent_level -= 1
+                        self.writeline("):")
+                        self.indent_level += 1
+                        self.compiling_what = 'function'
+                        start_block = self.find_block_by_type('Start')
+                        if start_block:
+                            next_id = self.get_next_block(start_block['id'])
+                            yield next_id
 
                 #logging.debug("Function block return var name: %s, compiling what: %s", block.get('return_var_name'), self.compiling_what)
                 target_var = self.resolve_value(block['return_var_name'], 'Variable') if 'return_var_name' in block else None
@@ -1212,7 +1617,7 @@ class CodeCompiler:
                     #logging.info(f"Processing next block after Function call: {next_id}")
                     pass
 
-                self.process_block(next_id)
+                yield next_id
         
     def handle_return_block(self, block):
         return_value = self.resolve_value(block['value_1_name'], block['value_1_type'])
@@ -1223,7 +1628,7 @@ class CodeCompiler:
         if next_id:
             #logging.info(f"Processing next block after Return: {next_id}")
             pass
-        self.process_block(next_id)
+        yield next_id
 
     def handle_math_block(self, block):
         value_1 = self.resolve_value(block['value_1_name'], block['value_1_type'])
@@ -1250,7 +1655,7 @@ class CodeCompiler:
         if next_id:
             #logging.info(f"Processing next block after Math: {next_id}")
             pass
-        self.process_block(next_id)
+        yield next_id
     
     def handle_rand_block(self, block):
         value_1 = self.resolve_value(block['value_1_name'], block['value_1_type'])
@@ -1262,7 +1667,7 @@ class CodeCompiler:
         if next_id:
             #logging.info(f"Processing next block after Random: {next_id}")
             pass
-        self.process_block(next_id)
+        yield next_id
 
     def handle_logic_block(self, block):
         value_1 = self.resolve_value(block['value_1_name'], block['value_1_type'])
@@ -1280,18 +1685,18 @@ class CodeCompiler:
 
         self.writeline(f"if {value_1} {operators[block['operator']]} {value_2}:")
         self.indent_level += 1
-        self.process_block(out_1_id)
+        yield out_1_id
         self.indent_level -= 1
         self.writeline("else:")
         self.indent_level += 1
-        self.process_block(out_2_id)
+        yield out_2_id
         self.indent_level -= 1
 
         next_id = self.get_next_block(block['id'])
         if next_id:
             #logging.info(f"Processing next block after Logic: {next_id}")
             pass
-        self.process_block(next_id)
+        yield next_id
 
     def handle_bool_block(self, block):
         value_1 = self.resolve_value(block['value_1_name'], block['value_1_type'])
@@ -1317,14 +1722,14 @@ class CodeCompiler:
         next_id = self.get_next_block(block['id'])
         if block['type'] != 'Not':
             self.indent_level += 1
-            self.process_block(out_1_id)
+            yield out_1_id
             self.indent_level -= 1
         
         if next_id:
             #logging.info(f"Processing next block after Bool: {next_id}")
             pass
         if block['type'] == 'Not':
-            self.process_block(next_id)
+            yield next_id
 
     def handle_LED_block(self, block):
         if block['type'] in ('Blink_LED', 'Toggle_LED', 'PWM_LED', 'LED_ON', 'LED_OFF'):
@@ -1355,7 +1760,7 @@ class CodeCompiler:
         if next_id:
             #logging.info(f"Processing next block after LED: {next_id}")
             pass
-        self.process_block(next_id)
+        yield next_id
 
     def handle_networks_block(self, block):
         outputs = []
@@ -1364,23 +1769,40 @@ class CodeCompiler:
         #logging.info("Handling Networks block %s with outputs: %s (count=%s)", block['id'], outputs, len(outputs))
         for i in range(block['networks']):
             #logging.debug("Processing network block output %s with next block ID: %s", i, outputs[i])
-            self.process_block(outputs[i])
+            yield outputs[i]
 
     def handle_end_block(self, block):
         #logging.info(f"Handling End block {block['id']}")
         if self.compiling_what == 'function':
-            #logging.info(f"Ending function compilation for {self.compiling_function}")
-            self.compiling_what = 'canvas'
-            self.compiling_function = None
             self.writeline("")  # Blank line after function
-            self.current_lines = self.main_lines
-            self.indent_level = self.memory_indent_level+1
-            #logging.info(f"Resuming canvas compilation at indent level {self.indent_level}")
-            #logging.info(f"Last block was function call: {self.last_block}")
-            next_id = self.get_next_block(self.last_block['id'])
-            self.process_block(next_id)
+            self.cache_function()
+            yield from self.leave_function()
         else:
             #logging.info("End block reached in canvas - no action needed")
             pass
         return
+
+    def cache_function(self):
+        """Store the definition that just ended as its function's cache entry"""
+        if not self.open_functions:
+            return
+        func_id, key, call_block, start = self.open_functions.pop()
+        if self.last_block is not call_block:
+            return  # A call inside the body moved where the main program resumes, so a replay would differ
+        self.function_out.seek(start)
+        text = self.function_out.read()  # Leaves the spool positioned at its end again
+        self.store_section(('function', func_id), key, text=text,
+                           return_value=self.func_to_compile[self.compiling_function][2])
+
+    def leave_function(self):
+        """Close the function definition and resume the main program after its call"""
+        #logging.info(f"Ending function compilation for {self.compiling_function}")
+        self.compiling_what = 'canvas'
+        self.compiling_function = None
+        self.current_out = self.main_out
+        self.indent_level = self.memory_indent_level+1
+        #logging.info(f"Resuming canvas compilation at indent level {self.indent_level}")
+        #logging.info(f"Last block was function call: {self.last_block}")
+        next_id = self.get_next_block(self.last_block['id'])
+        yield next_id
     
\ No newline at end of file
@@ -0,0 +1,114 @@
+from Imports import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QTreeWidget, QTreeWidgetItem,
+                     QIcon, Qt, pyqtSignal, logging)
+
+from Imports import get_Utils
+Utils = get_Utils()
+
+#MARK: - Deployment Window
+class DeploymentWindow(QDialog):
+    """
+    Per-board view of a run on several Raspberry Pis: upload/run status and
+    reports received from each board, plus the choice of which board's live
+    values the variable and device panels show.
+    """
+    _instance = None
+
+    source_selected = pyqtSignal(str)  # Host whose values the panels should show
+
+    def __init__(self, parent=None):
+        super().__init__()
+        self.parent_canvas = parent
+        self.is_hidden = True
+        self.translation_manager = Utils.translation_manager
+        self.t = self.translation_manager.translate
+        self.rows = {}  # host -> QTreeWidgetItem
+        self.report_counts = {}
+        self.setup_ui()
+
+    @classmethod
+    def get_instance(cls, parent=None):
+        """Get or create singleton instance"""
+        if cls._instance is not None:
+            try:
+                _ = cls._instance.isVisible()
+                return cls._instance
+            except RuntimeError:
+                cls._instance = None
+            except Exception as e:
+                logging.error(f"Error accessing existing DeploymentWindow instance: {e}")
+                cls._instance = None
+
+        if cls._instance is None:
+            cls._instance = cls(parent=parent)
+        return cls._instance
+
+    def setup_ui(self):
+        self.setWindowTitle(self.t("deployment_window.window_title"))
+        self.setWindowIcon(QIcon('resources/images/APPicon.ico'))
+        self.resize(460, 360)
+        self.setWindowFlags(Qt.WindowType.Window)
+
+        layout = QVBoxLayout(self)
+
+        select_layout = QHBoxLayout()
+        select_layout.addWidget(QLabel(self.t("deployment_window.show_values")))
+        self.source_combo = QComboBox()
+        self.source_combo.currentTextChanged.connect(self.on_source_changed)
+        select_layout.addWidget(self.source_combo, 1)
+        layout.addLayout(select_layout)
+
+        self.tree = QTreeWidget()
+        self.tree.setColumnCount(3)
+        self.tree.setHeaderLabels([
+            self.t("deployment_window.board"),
+            self.t("deployment_window.status"),
+            self.t("deployment_window.reports"),
+        ])
+        self.tree.setRootIsDecorated(False)
+        self.tree.setColumnWidth(0, 150)
+        self.tree.setColumnWidth(1, 220)
+        layout.addWidget(self.tree)
+
+    def set_hosts(self, hosts):
+        """Start a new run on hosts; the first one's values are shown"""
+        self.tree.clear()
+        self.rows = {}
+        self.report_counts = {host: 0 for host in hosts}
+        self.source_combo.blockSignals(True)
+        self.source_combo.clear()
+        self.source_combo.addItems(hosts)
+        self.source_combo.blockSignals(False)
+        for host in hosts:
+            self.rows[host] = QTreeWidgetItem([host, self.t("deployment_window.waiting"), "0"])
+            self.tree.addTopLevelItem(self.rows[host])
+
+    def set_status(self, host, status):
+        if host in self.rows:
+            self.rows[host].setText(1, status.strip())
+
+    def add_reports(self, counts):
+        """Slot for TelemetryIngestThread.activity"""
+        for host, count in counts.items():
+            if host in self.rows:
+                self.report_counts[host] += count
+                self.rows[host].setText(2, str(self.report_counts[host]))
+
+    def on_source_changed(self, host):
+        if host:
+            self.source_selected.emit(host)
+
+    def open(self):
+        if self.is_hidden:
+            self.is_hidden = False
+            self.show()
+        self.raise_()
+        self.activateWindow()
+        return self
+
+    def reject(self):
+        """Redirect Esc key (reject) to close() so closeEvent fires"""
+        self.close()
+
+    def closeEvent(self, event):
+        self.is_hidden = True
+        event.accept()
@@ -0,0 +1,169 @@
+"""
+headless_compiler.py - Compile saved projects without the GUI
+
+Loads .project files through FileManager (pure data, no QApplication and no
+QGraphicsItems), rebuilds the dictionaries CodeCompiler reads and compiles
+them to a chosen output path. A directory of projects is fanned out across a
+process pool, one project per worker call.
+
+Nothing here may load PyQt6, so this module, CodeCompiler, FileManager and
+Utils import their dependencies directly instead of through Imports.
+
+Usage:
+    python headless_compiler.py my_project.project -o File.py
+    python headless_compiler.py projects/ -o build/ --jobs 8
+    python headless_compiler.py projects/ --model 0      (force Pico W)
+    python headless_compiler.py projects/ --event-inputs (interrupt-driven buttons)
+    python headless_compiler.py projects/ --delta-telemetry --binary-telemetry
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
+import sys
+import logging
+from pathlib import Path
+import Utils
+from FileManager import FileManager
+from code_compiler import CodeCompiler
+
+
+def link_connections(canvas_info):
+    """Mirror GUI._rebuild_connections: register every path on its blocks"""
+    blocks = canvas_info['blocks']
+    for conn_id, conn_data in canvas_info['paths'].items():
+        from_block_id = str(conn_data.get("from"))
+        to_block_id = str(conn_data.get("to"))
+        if from_block_id not in blocks or to_block_id not in blocks:
+            continue
+        blocks[from_block_id].setdefault('out_connections', {}).setdefault(conn_id, conn_data.get("from_circle_type", "out"))
+        blocks[to_block_id].setdefault('in_connections', {}).setdefault(conn_id, conn_data.get("to_circle_type", "in"))
+
+
+def populate_compiler_state(model_index=None):
+    """
+    Fill Utils.main_canvas, Utils.functions, Utils.variables and Utils.devices
+    from Utils.project_data, the way GUI.rebuild_from_data does but without widgets
+
+    Args:
+        model_index: RPi model index to compile for; None uses the project setting
+    """
+    data = Utils.project_data
+    Utils.main_canvas = {
+        'name': 'main_canvas',
+        'id': 'main_canvas',
+        'blocks': data.main_canvas.get('blocks', {}),
+        'paths': data.main_canvas.get('paths', {}),
+    }
+    link_connections(Utils.main_canvas)
+
+    # Function names live in the canvas list, keyed by function id
+    names = {info.get('id'): info.get('name') for info in data.canvases.values() if info.get('ref') == 'function'}
+    Utils.functions = {}
+    for f_id, f_data in data.functions.items():
+        Utils.functions[f_id] = {
+            'name': names.get(f_id, f_id),
+            'id': f_id,
+            'blocks': f_data.get('blocks', {}),
+            'paths': f_data.get('paths', {}),
+        }
+        link_connections(Utils.functions[f_id])
+
+    Utils.variables = {
+        'main_canvas': data.variables.get('main_canvas', {}),
+        'function_canvases': data.variables.get('function_canvases', {}),
+    }
+    Utils.devices = {
+        'main_canvas': data.devices.get('main_canvas', {}),
+        'function_canvases': data.devices.get('function_canvases', {}),
+    }
+    if model_index is None:
+        model_index = data.settings.get('rpi_model_index', 6)
+    Utils.app_settings.rpi_model = data.settings.get('rpi_model', "RPI 4 model B")
+    Utils.app_settings.rpi_model_index = model_index
+
+
+def compile_project(project_path, output_path, model_index=None, settings=None):
+    """
+    Compile one project file. Runs in pool workers, so it only returns plain data.
+    settings maps Utils.app_settings attribute names to values overriding them.
+
+    Returns:
+        (project_path, output_path, error message or None)
+    """
+    try:
+        if not FileManager.load_project_file(project_path):
+            return project_path, output_path, "could not load project"
+        populate_compiler_state(model_index)
+        for name, value in (settings or {}).items():
+            setattr(Utils.app_settings, name, value)
+        CodeCompiler().compile(output_path)
+        return project_path, output_path, None
+    except Exception as e:
+        return project_path, output_path, str(e)
+
+
+def collect_jobs(source, output=None):
+    """Pair every project under source with the path its code is written to"""
+    source = Path(source)
+    if source.is_dir():
+        out_dir = Path(output) if output else source
+        os.makedirs(out_dir, exist_ok=True)
+        projects = sorted(source.glob("*" + FileManager.PROJECT_EXTENSION))
+        return [(str(p), str(out_dir / (p.stem + ".py"))) for p in projects]
+    return [(str(source), str(output) if output else str(source.with_suffix(".py")))]
+
+
+def compile_all(jobs, model_index=None, workers=None, settings=None):
+    """Compile (project, output) pairs, in parallel when there is more than one"""
+    results = []
+    if len(jobs) <= 1 or workers == 1:
+        for project_path, output_path in jobs:
+            results.append(compile_project(project_path, output_path, model_index, settings))
+        return results
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(compile_project, project_path, output_path, model_index, settings)
+                   for project_path, output_path in jobs]
+        for future in as_completed(futures):
+            results.append(future.result())
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile Omniboard Studio projects without the GUI")
+    parser.add_argument("source", help=f"{FileManager.PROJECT_EXTENSION} file or a directory of them")
+    parser.add_argument("-o", "--output", help="Output file (single project) or directory (project folder)")
+    parser.add_argument("-m", "--model", type=int, default=None,
+                        help="RPi model index to compile for (0 = Pico W); defaults to each project's setting")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--event-inputs", action="store_true", default=None,
+                        help="Read buttons through edge interrupts instead of polling (default: app setting)")
+    parser.add_argument("--delta-telemetry", action="store_true", default=None,
+                        help="Report only changed values between full snapshots (default: app setting)")
+    parser.add_argument("--binary-telemetry", action="store_true", default=None,
+                        help="Report through length-prefixed binary frames instead of JSON lines (default: app setting)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.source):
+        parser.error(f"{args.source} does not exist")
+    jobs = collect_jobs(args.source, args.output)
+    if not jobs:
+        print(f"No {FileManager.PROJECT_EXTENSION} files in {args.source}")
+        return 1
+
+    settings = {name: value for name, value in (('event_driven_inputs', args.event_inputs),
+                                                ('delta_telemetry', args.delta_telemetry),
+                                                ('binary_telemetry', args.binary_telemetry)) if value is not None}
+    failed = 0
+    for project_path, output_path, error in compile_all(jobs, args.model, args.jobs, settings):
+        if error:
+            failed += 1
+            logging.error(f"{project_path}: {error}")
+            print(f"[FAIL] {project_path}: {error}")
+        else:
+            print(f"[ OK ] {project_path} -> {output_path}")
+    print(f"{len(jobs) - failed}/{len(jobs)} projects compiled")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
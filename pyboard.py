@@ -68,7 +68,9 @@ Or:
 """
 
 import ast
+import binascii
 import errno
+import hashlib
 import os
 import struct
 import sys
@@ -445,7 +447,7 @@ class Pyboard:
         # return normal and error output
         return data, data_err
 
-    def raw_paste_write(self, command_bytes):
+    def raw_paste_write(self, command_bytes, progress_callback=None):
         # Read initial header, with window size.
         data = self.serial.read(2)
         window_size = struct.unpack("<H", data)[0]
@@ -471,6 +473,8 @@ class Pyboard:
             self.serial.write(b)
             window_remain -= len(b)
             i += len(b)
+            if progress_callback:
+                progress_callback(i, len(command_bytes))
 
         # Indicate end of data.
         self.serial.write(b"\x04")
@@ -480,7 +484,7 @@ class Pyboard:
         if not data.endswith(b"\x04"):
             raise PyboardError("could not complete raw paste: {}".format(data))
 
-    def exec_raw_no_follow(self, command):
+    def exec_raw_no_follow(self, command, progress_callback=None):
         if isinstance(command, bytes):
             command_bytes = command
         else:
@@ -500,7 +504,7 @@ class Pyboard:
                 pass
             elif data == b"R\x01":
                 # Device supports raw-paste mode, write out the command using this mode.
-                return self.raw_paste_write(command_bytes)
+                return self.raw_paste_write(command_bytes, progress_callback)
             else:
                 # Device doesn't support raw-paste, fall back to normal raw REPL.
                 data = self.read_until(1, b"w REPL; CTRL-B to exit\r\n>")
@@ -682,6 +686,141 @@ class Pyboard:
                     progress_callback(written, src_size)
         self.exec_("f.close()")
 
+    def fs_put_paste(self, src, dest, segment_size=8192, progress_callback=None):
+        """
+        Like fs_put, but sends segment_size bytes of the file per exec as raw-paste
+        data (the device's flow-control windows pace it) instead of one exec round
+        trip per 256 byte chunk. Devices without raw-paste get the same execs
+        through the normal raw REPL.
+        """
+        src_size = os.path.getsize(src)
+        written = 0
+        with open(src, "rb") as f:
+            mode = "wb"
+            while True:
+                data = f.read(segment_size)
+                if not data and mode == "ab":
+                    break
+                lines = ["f=open('%s','%s')" % (dest, mode), "w=f.write"]
+                for i in range(0, len(data), 256):
+                    lines.append("w(" + repr(data[i : i + 256]) + ")")
+                lines.append("f.close()")
+                command = "\n".join(lines)
+
+                def segment_progress(sent, total, base=written, size=len(data)):
+                    if progress_callback:
+                        progress_callback(base + size * sent // total, src_size)
+
+                self.exec_raw_no_follow(command, segment_progress)
+                ret, ret_err = self.follow(10)
+                if ret_err:
+                    raise PyboardError("exception", ret, ret_err)
+                written += len(data)
+                if progress_callback:
+                    progress_callback(written, src_size)
+                mode = "ab"
+
+    def fs_put_stream(self, src, dest, chunk_size=2048, window=2, progress_callback=None):
+        """
+        Like fs_put, but streams the file as base64 lines to a receiver loop running
+        on the device, which decodes each line with binascii and acknowledges it.
+        Up to `window` lines are in flight, so the next chunk is on the wire while
+        the device writes the previous one; a single exec covers the whole file.
+        """
+        src_size = os.path.getsize(src)
+        self.exec_("f=open('%s','wb')" % dest)
+        self.exec_raw_no_follow(
+            "import sys,binascii\nr=sys.stdin.buffer.readline\nw=f.write\nn=0\n"
+            "while 1:\n l=r()\n if len(l)<2:break\n n+=w(binascii.a2b_base64(l[:-1]))\n sys.stdout.write('A')\n"
+            "f.close()\nprint(n)"
+        )
+        written = 0
+        pending = 0
+        with open(src, "rb") as f:
+            while True:
+                data = f.read(chunk_size)
+                while pending >= window or (not data and pending):
+                    self.read_stream_ack()
+                    pending -= 1
+                if not data:
+                    break
+                self.serial.write(binascii.b2a_base64(data))
+                pending += 1
+                written += len(data)
+                if progress_callback:
+                    progress_callback(written, src_size)
+        self.serial.write(b"\n")  # Empty line ends the transfer
+        ret, ret_err = self.follow(10)
+        if ret_err:
+            raise PyboardError("exception", ret, ret_err)
+        if int(ret) != src_size:
+            raise PyboardError("fs_put_stream: device wrote %s of %u bytes" % (ret.strip(), src_size))
+
+    def wait_stream(self, timeout=10):
+        """Wait up to timeout seconds for data from the device, return how many bytes are waiting"""
+        deadline = time.monotonic() + timeout
+        while not self.serial.inWaiting():
+            if time.monotonic() >= deadline:
+                raise PyboardError("timeout waiting for stream data")
+            time.sleep(0.001)
+        return self.serial.inWaiting()
+
+    def read_stream_ack(self):
+        """Read one line acknowledgement of fs_put_stream; raise if the receiver failed instead"""
+        self.wait_stream()
+        data = self.serial.read(1)
+        if data == b"A":
+            return
+        if data == b"\x04":
+            # The receiver raised: the rest is its traceback. Lines still in flight
+            # reach the raw REPL as command text, Ctrl-C discards them.
+            ret_err = self.read_until(1, b"\x04")[:-1]
+            self.serial.write(b"\x03")
+            raise PyboardError("exception", b"", ret_err)
+        raise PyboardError("fs_put_stream: unexpected response from device: %r" % data)
+
+    def fs_get_stream(self, src, dest, chunk_size=2048, progress_callback=None):
+        """
+        Like fs_get, but the device sends the whole file as base64 lines from one
+        exec instead of one exec round trip per repr-escaped chunk. The device ends
+        with '.' and waits for a byte from us before it exits, so the bulk reads
+        here never swallow the raw REPL's end of output.
+        """
+        if progress_callback:
+            src_size = self.fs_stat(src).st_size
+        try:
+            self.exec_("f=open('%s','rb')" % src)
+        except PyboardError as e:
+            raise e.convert(src)
+        self.exec_raw_no_follow(
+            "import sys,binascii\nr=f.read\nwhile 1:\n b=r(%u)\n if not b:break\n"
+            " sys.stdout.write(binascii.b2a_base64(b))\nf.close()\nsys.stdout.write('.')\nsys.stdin.buffer.read(1)"
+            % chunk_size
+        )
+        received = bytearray()
+        written = 0
+        with open(dest, "wb") as f:
+            while True:
+                received.extend(self.serial.read(self.wait_stream()))
+                if b"\x04" in received:
+                    raise PyboardError("exception", b"", bytes(received[received.find(b"\x04") + 1 :]))
+                done = received.endswith(b".")
+                end = len(received) - 1 if done else received.rfind(b"\n") + 1
+                if end > 0:
+                    # One line per device read, each with its own padding
+                    chunk = b"".join(binascii.a2b_base64(line) for line in bytes(received[:end]).split(b"\n"))
+                    del received[:end]
+                    f.write(chunk)
+                    written += len(chunk)
+                    if progress_callback:
+                        progress_callback(written, src_size)
+                if done:
+                    break
+        self.serial.write(b"\n")
+        ret, ret_err = self.follow(10)
+        if ret_err:
+            raise PyboardError("exception", ret, ret_err)
+
     def fs_mkdir(self, dir):
         self.exec_("import os\nos.mkdir('%s')" % dir)
 
@@ -694,12 +833,252 @@ class Pyboard:
     def fs_touch(self, src):
         self.exec_("f=open('%s','a')\nf.close()" % src)
 
+    def batch(self):
+        """Queue filesystem operations to run in one exec, see PyboardBatch"""
+        return PyboardBatch(self)
+
+    def sync(self, local_dir, remote_dir="", delete=True, progress_callback=None):
+        """
+        Make remote_dir a copy of local_dir, transferring only what changed.
+
+        A manifest of remote sizes and hashes comes back from one exec and is
+        diffed against the local tree. Only new or changed files are uploaded
+        (fs_put_stream); with delete, remote files and directories missing
+        locally are removed. Deletions and new directories go in one batch.
+
+        progress_callback(written, total) counts bytes of the uploaded files.
+        Returns sync_result(uploaded, deleted, unchanged) of paths relative to
+        remote_dir.
+        """
+        prefix = remote_dir.rstrip("/")
+        root = "/" if remote_dir.startswith("/") else ""
+
+        def remote_path(rel):
+            return prefix + "/" + rel if prefix else root + rel
+
+        local_dirs = set()
+        local_files = {}
+        for dirpath, dirnames, filenames in os.walk(local_dir):
+            rel_dir = os.path.relpath(dirpath, local_dir).replace(os.path.sep, "/")
+            rel_dir = "" if rel_dir == "." else rel_dir + "/"
+            local_dirs.update(rel_dir + name for name in dirnames)
+            for name in filenames:
+                local_files[rel_dir + name] = os.path.join(dirpath, name)
+
+        result = self.batch().manifest(remote_dir).run()[0]
+        if result.error is not None and result.error.errno != errno.ENOENT:
+            raise result.error
+        remote_dirs = set()
+        remote_files = {}
+        for path, is_dir, size, digest in result.value or []:
+            rel = path[len(prefix) + 1 :] if prefix else path.lstrip("/")
+            if is_dir:
+                remote_dirs.add(rel)
+            else:
+                remote_files[rel] = (size, digest)
+
+        uploads = []
+        unchanged = []
+        for rel, src in sorted(local_files.items()):
+            remote = remote_files.get(rel)
+            if remote is not None and remote[0] == os.path.getsize(src):
+                with open(src, "rb") as f:
+                    if hashlib.sha256(f.read()).hexdigest() == remote[1]:
+                        unchanged.append(rel)
+                        continue
+            uploads.append(rel)
+
+        batch = self.batch()
+        deleted = []
+        if delete:
+            # Files first, then directories deepest first so each is empty when removed
+            for rel in sorted(remote_files):
+                if rel not in local_files:
+                    batch.rm(remote_path(rel))
+                    deleted.append(rel)
+            for rel in sorted(remote_dirs, key=lambda d: d.count("/"), reverse=True):
+                if rel not in local_dirs:
+                    batch.rmdir(remote_path(rel))
+                    deleted.append(rel + "/")
+        if prefix and result.error is not None:
+            batch.makedirs(prefix)
+        for rel in sorted(local_dirs, key=lambda d: d.count("/")):
+            if rel not in remote_dirs:
+                batch.mkdir(remote_path(rel))
+        for op_result in batch.run(stop_on_error=True):
+            if op_result.error is not None:
+                raise op_result.error
+
+        total = sum(os.path.getsize(local_files[rel]) for rel in uploads)
+        done = 0
+        for rel in uploads:
+            size = os.path.getsize(local_files[rel])
+
+            def file_progress(written, _, base=done):
+                if progress_callback:
+                    progress_callback(base + written, total)
+
+            self.fs_put_stream(local_files[rel], remote_path(rel), progress_callback=file_progress)
+            done += size
+        return sync_result(uploads, deleted, unchanged)
+
 
 # in Python2 exec is a keyword so one must use "exec_"
 # but for Python3 we want to provide the nicer version "exec"
 setattr(Pyboard, "exec", Pyboard.exec_)
 
 
+batch_result = namedtuple("batch_result", ["op", "path", "value", "error"])
+sync_result = namedtuple("sync_result", ["uploaded", "deleted", "unchanged"])
+
+_batch_script = """\
+import os
+def _t(p):
+ open(p,'a').close()
+def _e(p):
+ try:
+  os.stat(p)
+  return True
+ except OSError:
+  return False
+def _l(p):
+ return [tuple(e) for e in os.ilistdir(p)]
+def _w(p):
+ r=[]
+ s=[p]
+ while s:
+  d=s.pop()
+  b=d.rstrip('/')
+  for e in os.ilistdir(d):
+   q=(b+'/' if b else '/' if d else '')+e[0]
+   r.append((q,e[1]==0x4000,e[3] if len(e)>3 else 0))
+   if e[1]==0x4000:
+    s.append(q)
+ return r
+def _h(p):
+ import hashlib,binascii
+ h=hashlib.sha256()
+ b=bytearray(512)
+ m=memoryview(b)
+ with open(p,'rb') as f:
+  while 1:
+   n=f.readinto(b)
+   if not n:break
+   h.update(m[:n])
+ return binascii.hexlify(h.digest()).decode()
+def _d(p):
+ q='/' if p[:1]=='/' else ''
+ for c in p.split('/'):
+  if c:
+   q+=c
+   if not _e(q):
+    os.mkdir(q)
+   q+='/'
+def _m(p):
+ return [(q,d,n,None if d else _h(q)) for q,d,n in _w(p)]
+_f={'mkdir':os.mkdir,'rm':os.remove,'rmdir':os.rmdir,'touch':_t,'stat':os.stat,'ls':_l,'exists':_e,'walk':_w,'hash':_h,'manifest':_m,'makedirs':_d}
+for o,p in %r:
+ try:
+  print(repr((_f[o](p),None)),end=',')
+ except OSError as e:
+  print(repr((None,e.args[0])),end=',')
+  if %r:break
+"""
+
+
+class PyboardBatch:
+    """
+    Filesystem operations queued on the host and run on the device by one exec,
+    instead of one exec_ round trip each. Use Pyboard.batch():
+
+        batch = pyb.batch()
+        batch.mkdir("lib")
+        batch.rm("old.py")
+        for result in batch.run():
+            ...
+
+    run() returns one batch_result(op, path, value, error) per queued operation.
+    error is an OSError for operations that failed on the device, else None.
+    """
+
+    def __init__(self, pyb):
+        self.pyb = pyb
+        self.ops = []
+
+    def add(self, op, path):
+        self.ops.append((op, path))
+        return self
+
+    def mkdir(self, path):
+        return self.add("mkdir", path)
+
+    def makedirs(self, path):
+        """Create path and any missing parent directories; existing ones are fine"""
+        return self.add("makedirs", path)
+
+    def rm(self, path):
+        return self.add("rm", path)
+
+    def rmdir(self, path):
+        return self.add("rmdir", path)
+
+    def touch(self, path):
+        return self.add("touch", path)
+
+    def stat(self, path):
+        """value: os.stat_result"""
+        return self.add("stat", path)
+
+    def ls(self, path=""):
+        """value: list of listdir_result"""
+        return self.add("ls", path)
+
+    def exists(self, path):
+        """value: bool"""
+        return self.add("exists", path)
+
+    def walk(self, path=""):
+        """value: list of (path, is_dir, size) for everything below path, recursively"""
+        return self.add("walk", path)
+
+    def hash(self, path):
+        """value: sha256 hex digest of the file's content"""
+        return self.add("hash", path)
+
+    def manifest(self, path=""):
+        """value: walk() entries with a fourth item, the sha256 hex digest of files (None for directories)"""
+        return self.add("manifest", path)
+
+    def run(self, stop_on_error=False):
+        """
+        Run the queued operations and clear the queue.
+        With stop_on_error the device stops at the first failing operation and the
+        results end there.
+        """
+        ops, self.ops = self.ops, []
+        if not ops:
+            return []
+        buf = bytearray(b"[")
+        self.pyb.exec_(
+            _batch_script % (ops, stop_on_error),
+            data_consumer=lambda b: buf.extend(b.replace(b"\x04", b"")),
+        )
+        buf.extend(b"]")
+        results = []
+        for (op, path), (value, error) in zip(ops, ast.literal_eval(buf.decode())):
+            if error is not None:
+                value = None
+                error = OSError(error, os.strerror(error) if isinstance(error, int) else error, path)
+            elif op == "stat":
+                value = os.stat_result(value)
+            elif op == "ls":
+                value = [
+                    listdir_result(*f) if len(f) == 4 else listdir_result(*(f + (0,))) for f in value
+                ]
+            results.append(batch_result(op, path, value, error))
+        return results
+
+
 def execfile(filename, device="/dev/ttyACM0", baudrate=115200, user="micro", password="python"):
     pyb = Pyboard(device, baudrate, user, password)
     pyb.enter_raw_repl()
@@ -738,9 +1117,9 @@ def filesystem_command(pyb, args, progress_callback=None, verbose=False):
             dest = args[-1]
             if dest.startswith(":"):
                 op_remote_src = pyb.fs_cp
-                op_local_src = pyb.fs_put
+                op_local_src = pyb.fs_put_stream
             else:
-                op_remote_src = pyb.fs_get
+                op_remote_src = pyb.fs_get_stream
                 op_local_src = lambda src, dest, **_: __import__("shutil").copy(src, dest)
             for src in srcs:
                 if verbose:
@@ -756,20 +1135,25 @@ def filesystem_command(pyb, args, progress_callback=None, verbose=False):
             ops = {
                 "cat": pyb.fs_cat,
                 "ls": pyb.fs_ls,
-                "mkdir": pyb.fs_mkdir,
-                "rm": pyb.fs_rm,
-                "rmdir": pyb.fs_rmdir,
-                "touch": pyb.fs_touch,
             }
-            if cmd not in ops:
+            batched = ("mkdir", "rm", "rmdir", "touch")
+            if cmd not in ops and cmd not in batched:
                 raise PyboardError("'{}' is not a filesystem command".format(cmd))
             if cmd == "ls" and not args:
                 args = [""]
+            batch = pyb.batch()
             for src in args:
                 src = fname_remote(src)
                 if verbose:
                     print("%s :%s" % (cmd, src))
-                ops[cmd](src)
+                if cmd in batched:
+                    batch.add(cmd, src)
+                else:
+                    ops[cmd](src)
+            # mkdir/rm/rmdir/touch on all paths in one exec, stopping at the first failure
+            for result in batch.run(stop_on_error=True):
+                if result.error:
+                    raise PyboardError("{} :{}: {}".format(cmd, result.path, result.error.strerror))
     except PyboardError as er:
         if len(er.args) > 1:
             print(str(er.args[2], "ascii"))
@@ -0,0 +1,155 @@
+"""
+omniboard_agent.py - Resident program runner deployed to the Raspberry Pi
+
+Started once over SSH and kept running on one channel, so each new program
+runs in an interpreter that has already imported RPi.GPIO and the standard
+modules instead of cold-starting python3.
+
+Protocol (stdin, from the app):
+    RUN <size>\\n followed by <size> bytes of program source
+    STOP\\n
+    end of input stops the current program and exits the agent
+
+stdout carries the program's own output unchanged. Agent events go to stderr
+as JSON lines: {"event": "ready" | "started" | "exited" | "skipped" | "restarting", ...}
+
+Programs run in the main thread because generated code installs signal
+handlers. A stop sends SIGINT to the agent, which the program's handler turns
+into SystemExit so its cleanup (GPIO.cleanup) runs. A program that does not
+exit in time makes the agent re-exec itself.
+"""
+import sys
+import os
+import json
+import signal
+import threading
+import queue
+import traceback
+import time
+
+try:
+    import RPi.GPIO  # Warm import: this is what a cold start spends most of its time on
+except ImportError:
+    pass
+
+STOP_TIMEOUT = 3.0  # Seconds a program gets to exit after SIGINT before the agent restarts
+PENDING_PATH = os.path.expanduser("~/.omniboard_pending.py")  # Program handed over across a restart
+
+events = os.fdopen(os.dup(2), 'w', buffering=1)  # Protocol channel, separate from program output
+programs = queue.Queue()  # (generation, source) or None to exit
+running = threading.Event()  # Set while a program executes
+event_lock = threading.Lock()
+state_lock = threading.Lock()  # Orders stops against a program being started
+generation = 0  # Number of the last program queued
+stopped_generation = 0  # Programs numbered up to this one were stopped, started or not
+
+
+def send(event, **fields):
+    fields['event'] = event
+    with event_lock:
+        events.write(json.dumps(fields) + "\n")
+        events.flush()
+
+
+def queue_program(source):
+    global generation
+    with state_lock:
+        generation += 1
+        programs.put((generation, source))
+
+
+def stop_program(pending=None):
+    """
+    Interrupt the running program; restart the agent if it does not exit in time.
+    Queued programs that have not started yet are cancelled too, including one
+    the main thread has just taken from the queue.
+    pending is the program to run next, carried over if a restart is needed.
+    """
+    global stopped_generation
+    with state_lock:
+        stopped_generation = generation
+        if not running.is_set():
+            return
+    os.kill(os.getpid(), signal.SIGINT)
+    deadline = time.monotonic() + STOP_TIMEOUT
+    while running.is_set() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    if running.is_set():
+        send("restarting")
+        sys.stdout.flush()
+        args = [sys.executable, "-u", os.path.abspath(__file__)]
+        if pending is not None:
+            with open(PENDING_PATH, 'wb') as f:
+                f.write(pending)
+            args.append(PENDING_PATH)
+        os.execv(sys.executable, args)
+
+
+def read_commands():
+    """Reader thread: parse commands from stdin and hand programs to the main thread"""
+    stdin = sys.stdin.buffer
+    while True:
+        line = stdin.readline()
+        if not line:
+            stop_program()
+            programs.put(None)
+            return
+        command = line.split()
+        if not command:
+            continue
+        if command[0] == b"RUN" and len(command) == 2:
+            source = stdin.read(int(command[1]))
+            stop_program(source)
+            queue_program(source)
+        elif command[0] == b"STOP":
+            stop_program()
+
+
+def run_program(source):
+    program_globals = {'__name__': '__main__', '__file__': 'File.py', '__builtins__': __builtins__}
+    code = 0
+    error = ""
+    try:
+        exec(compile(source, 'File.py', 'exec'), program_globals)
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else 0
+    except KeyboardInterrupt:
+        code = 0
+    except BaseException:
+        code = 1
+        error = traceback.format_exc()
+    finally:
+        sys.stdout.flush()
+        # Between programs a late stop is ignored; the next program gets fresh handlers
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    return code, error
+
+
+def main():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    threading.Thread(target=read_commands, daemon=True).start()
+    send("ready", pid=os.getpid())
+    if len(sys.argv) > 1 and os.path.exists(sys.argv[1]):
+        with open(sys.argv[1], 'rb') as f:
+            queue_program(f.read())
+        os.remove(sys.argv[1])
+    while True:
+        item = programs.get()
+        if item is None:
+            return
+        number, source = item
+        with state_lock:
+            if number <= stopped_generation:
+                send("skipped")  # A STOP arrived after it was queued
+                continue
+            signal.signal(signal.SIGINT, signal.default_int_handler)  # Installed before stop_program may signal
+            running.set()
+        send("started")
+        code, error = run_program(source)
+        running.clear()
+        send("exited", code=code, error=error)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+rpi_agent.py - Host side of the resident program agent on the Raspberry Pi
+
+The agent (resources/Agent/omniboard_agent.py) is uploaded once and started on
+a long-lived exec channel of a pooled SSH connection. Each run then sends the
+program bytes over that channel and the agent swaps them into its already warm
+interpreter, instead of uploading File.py, killing python3 and cold-starting a
+new one. See the agent's docstring for the protocol.
+"""
+
+from Imports import json, hashlib, logging, time, select, get_Utils
+
+Utils = get_Utils()
+
+AGENT_NAME = "omniboard_agent.py"
+READY_TIMEOUT = 10.0  # Seconds for a started agent to report ready (it imports RPi.GPIO)
+
+
+def agent_source_path():
+    return Utils.get_base_path() / "resources" / "Agent" / AGENT_NAME
+
+
+class RPiAgent:
+    """One running agent on a PooledConnection (stored as conn.agent)"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.channel = None
+        self.stderr_buffer = b""
+
+    def deploy(self):
+        """Upload the agent script unless the Pi already has this exact version"""
+        source = agent_source_path().read_bytes()
+        remote_path = f"{self.conn.home_dir()}/.{AGENT_NAME}"
+        stdin, stdout, stderr = self.conn.exec_command(f"sha256sum {remote_path} 2>/dev/null", timeout=5)
+        remote_hash = stdout.read().decode().split(" ")[0]
+        if remote_hash != hashlib.sha256(source).hexdigest():
+            with self.conn.get_sftp().open(remote_path, 'wb') as f:
+                f.write(source)
+        return remote_path
+
+    def start(self):
+        """Deploy and start the agent, then wait for its ready event"""
+        remote_path = self.deploy()
+        self.channel = self.conn.client.get_transport().open_session()
+        self.channel.exec_command(f"python3 -u {remote_path}")
+        deadline = time.monotonic() + READY_TIMEOUT
+        while time.monotonic() < deadline and self.alive():
+            text, events = self.read()
+            if any(event.get('event') == 'ready' for event in events):
+                return
+            time.sleep(0.05)
+        error = self.channel.recv_stderr(65536).decode(errors='replace') if self.channel.recv_stderr_ready() else ""
+        self.close()
+        raise RuntimeError(f"Agent did not start: {error or 'no ready event'}")
+
+    def alive(self):
+        return self.channel is not None and not self.channel.closed and not self.channel.exit_status_ready()
+
+    def wait(self, timeout):
+        """Block until output or an event arrives, or timeout seconds pass"""
+        select.select([self.channel], [], [], timeout)
+
+    def run(self, source):
+        """Replace the running program with source (bytes)"""
+        self.channel.sendall(b"RUN %d\n" % len(source) + source)
+
+    def stop(self):
+        if self.alive():
+            self.channel.sendall(b"STOP\n")
+
+    def read(self):
+        """
+        Return (program output bytes, list of agent events) available right now.
+        Never blocks.
+        """
+        chunks = []
+        while self.channel.recv_ready():
+            chunks.append(self.channel.recv(65536))
+        output = b"".join(chunks)
+        while self.channel.recv_stderr_ready():
+            self.stderr_buffer += self.channel.recv_stderr(65536)
+        events = []
+        *lines, self.stderr_buffer = self.stderr_buffer.split(b"\n")
+        for line in lines:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                logging.warning(f"Agent: {line.decode(errors='replace')}")  # Interpreter errors outside a program
+        return output, events
+
+    def close(self):
+        """Closing stdin makes the agent stop its program and exit"""
+        if self.channel is not None:
+            try:
+                self.channel.shutdown_write()
+                self.channel.close()
+            except Exception as e:
+                logging.error(f"Error closing agent channel: {e}")
+        self.channel = None
@@ -3,7 +3,8 @@ from Imports import get_Utils
 Utils = get_Utils()
 from Imports import (QDialog, QVBoxLayout, QLabel, QTabWidget, QWidget, QMessageBox, QPushButton, QHBoxLayout,
 QComboBox, Qt, QEvent, QFont, QMouseEvent, json, QLineEdit, QApplication, QProgressDialog, QPoint, QRect,
-QObject, pyqtSignal, QTimer, sys, os, subprocess, time, QIcon, QPropertyAnimation, QEasingCurve,  QAction, logging)
+QObject, pyqtSignal, QTimer, sys, os, subprocess, time, QIcon, QPropertyAnimation, QEasingCurve,  QAction, logging,
+QCheckBox)
 from rpi_autodiscovery import RPiAutoDiscovery, RPiConnectionWizard
 
 class DetectionWorker(QObject):
@@ -275,6 +276,16 @@ class DeviceSettingsWindow(QDialog):
         self.rpi_host_input.setPlaceholderText(self.t("setting_window.rpi_settings_tab.rpi_host_placeholder"))
         host_layout.addWidget(self.rpi_host_input)
         self.main_layout.addLayout(host_layout)
+
+        # Further boards that run the same program
+        targets_layout = QHBoxLayout()
+        targets_layout.addWidget(QLabel(self.t("setting_window.rpi_settings_tab.rpi_targets")))
+        self.rpi_targets_input = QLineEdit()
+        self.rpi_targets_input.setText(getattr(Utils.app_settings, 'rpi_targets', ''))
+        self.rpi_targets_input.setPlaceholderText(self.t("setting_window.rpi_settings_tab.rpi_targets_placeholder"))
+        self.rpi_targets_input.setToolTip(self.t("setting_window.rpi_settings_tab.rpi_targets_tooltip"))
+        targets_layout.addWidget(self.rpi_targets_input)
+        self.main_layout.addLayout(targets_layout)
         
         # Username input
         user_layout = QHBoxLayout()
@@ -302,11 +313,37 @@ class DeviceSettingsWindow(QDialog):
         pwd_layout.addWidget(self.rpi_password_input)
 
         self.rpi_host_input.textChanged.connect(lambda text: self.save_settings())
+        self.rpi_targets_input.textChanged.connect(lambda text: self.save_settings())
         self.rpi_user_input.textChanged.connect(lambda text: self.save_settings())
         self.rpi_password_input.textChanged.connect(lambda text: self.save_settings())
         self.toggle_password_action.triggered.connect(self.toggle_password_visibility)
 
         self.main_layout.addLayout(pwd_layout)
+
+        # Generated code: interrupt-driven buttons
+        self.event_inputs_check = QCheckBox(self.t("setting_window.rpi_settings_tab.event_driven_inputs"))
+        self.event_inputs_check.setToolTip(self.t("setting_window.rpi_settings_tab.event_driven_inputs_tooltip"))
+        self.event_inputs_check.setChecked(getattr(Utils.app_settings, 'event_driven_inputs', False))
+        self.event_inputs_check.toggled.connect(lambda checked: self.save_settings())
+        self.main_layout.addWidget(self.event_inputs_check)
+
+        self.delta_telemetry_check = QCheckBox(self.t("setting_window.rpi_settings_tab.delta_telemetry"))
+        self.delta_telemetry_check.setToolTip(self.t("setting_window.rpi_settings_tab.delta_telemetry_tooltip"))
+        self.delta_telemetry_check.setChecked(getattr(Utils.app_settings, 'delta_telemetry', False))
+        self.delta_telemetry_check.toggled.connect(lambda checked: self.save_settings())
+        self.main_layout.addWidget(self.delta_telemetry_check)
+
+        self.binary_telemetry_check = QCheckBox(self.t("setting_window.rpi_settings_tab.binary_telemetry"))
+        self.binary_telemetry_check.setToolTip(self.t("setting_window.rpi_settings_tab.binary_telemetry_tooltip"))
+        self.binary_telemetry_check.setChecked(getattr(Utils.app_settings, 'binary_telemetry', False))
+        self.binary_telemetry_check.toggled.connect(lambda checked: self.save_settings())
+        self.main_layout.addWidget(self.binary_telemetry_check)
+
+        self.rpi_agent_check = QCheckBox(self.t("setting_window.rpi_settings_tab.rpi_agent"))
+        self.rpi_agent_check.setToolTip(self.t("setting_window.rpi_settings_tab.rpi_agent_tooltip"))
+        self.rpi_agent_check.setChecked(getattr(Utils.app_settings, 'rpi_agent', False))
+        self.rpi_agent_check.toggled.connect(lambda checked: self.save_settings())
+        self.main_layout.addWidget(self.rpi_agent_check)
         self.tab_widget.addTab(tab, self.t("setting_window.rpi_settings_tab.title"))
     
     #MARK: - Settings Methods
@@ -408,7 +445,12 @@ class DeviceSettingsWindow(QDialog):
             'rpi_password': self.rpi_password_input.text(),
             'language': self.language_combo.currentData(),
             'theme': self.theme_combo.currentData(),
-            'ui_scale': self.size_combo.currentData()
+            'ui_scale': self.size_combo.currentData(),
+            'event_driven_inputs': self.event_inputs_check.isChecked(),
+            'delta_telemetry': self.delta_telemetry_check.isChecked(),
+            'binary_telemetry': self.binary_telemetry_check.isChecked(),
+            'rpi_agent': self.rpi_agent_check.isChecked(),
+            'rpi_targets': self.rpi_targets_input.text()
         }
 
         Utils.app_settings.rpi_model = data['rpi_model']
@@ -419,6 +461,11 @@ class DeviceSettingsWindow(QDialog):
         Utils.app_settings.language = data['language']
         Utils.app_settings.theme = data['theme']
         Utils.app_settings.ui_scale = data['ui_scale']
+        Utils.app_settings.event_driven_inputs = data['event_driven_inputs']
+        Utils.app_settings.delta_telemetry = data['delta_telemetry']
+        Utils.app_settings.binary_telemetry = data['binary_telemetry']
+        Utils.app_settings.rpi_agent = data['rpi_agent']
+        Utils.app_settings.rpi_targets = data['rpi_targets']
         return data
 
     def on_language_changed(self):
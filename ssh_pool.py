@@ -0,0 +1,198 @@
+"""
+ssh_pool.py - Reusable SSH connections to the Raspberry Pi
+
+Every compile-and-run used to build a fresh paramiko.SSHClient, run the full key
+exchange and authentication, open SFTP and ask the shell for $HOME. The pool
+keeps one authenticated connection per (host, user) alive between runs instead:
+
+- transports send keepalives so idle NAT/Wi-Fi links are not dropped
+- a connection is health checked before reuse (cheap checks always, an SFTP
+  round trip when it has been idle) and transparently replaced when dead
+- the SFTP session and the remote home directory are cached per connection
+
+Execution threads get a connection with SSHConnectionPool.get_instance().acquire()
+and hand it back with release(), or discard() it after an error. interrupt()
+closes a connection that is still in use, to break a blocking call on it.
+"""
+
+from Imports import paramiko, logging, threading, time
+
+KEEPALIVE_INTERVAL = 15  # Seconds between transport keepalive packets
+HEALTH_CHECK_AGE = 10.0  # Idle seconds after which reuse is confirmed by a round trip
+CHECK_TIMEOUT = 5.0  # Seconds a health check round trip may take
+CONNECT_TIMEOUT = 10  # Seconds for TCP connect, banner and authentication
+
+
+class PooledConnection:
+    """One authenticated SSH connection plus its cached SFTP session and home directory"""
+
+    def __init__(self, host, user, password):
+        self.host = host
+        self.user = user
+        self.password = password
+        self.client = None
+        self.sftp = None
+        self.home = None
+        self.agent = None  # rpi_agent.RPiAgent running on this connection, if any
+        self.last_used = 0.0
+        self.in_use = 0  # Threads currently holding this connection
+
+    def connect(self, known_hosts_path=None, policy=None, timeout=CONNECT_TIMEOUT):
+        client = paramiko.SSHClient()
+        if known_hosts_path:
+            client.load_system_host_keys(str(known_hosts_path))  # Load existing known hosts
+        if policy is not None:
+            client.set_missing_host_key_policy(policy)
+        self.client = client  # Stored before connecting so close() can interrupt it
+        client.connect(
+            self.host,
+            username=self.user,
+            password=self.password,
+            timeout=timeout,
+            banner_timeout=timeout,
+            auth_timeout=timeout,
+            allow_agent=False,
+            look_for_keys=False
+        )
+        client.get_transport().set_keepalive(KEEPALIVE_INTERVAL)
+        self.last_used = time.monotonic()
+
+    def healthy(self):
+        """True while the transport is up; idle connections must also answer an SFTP request"""
+        transport = self.client.get_transport() if self.client else None
+        if transport is None or not transport.is_active() or not transport.is_authenticated():
+            return False
+        if time.monotonic() - self.last_used < HEALTH_CHECK_AGE:
+            return True
+        try:
+            sftp = self.get_sftp()
+            sftp.get_channel().settimeout(CHECK_TIMEOUT)
+            sftp.stat('.')
+            sftp.get_channel().settimeout(None)
+            return True
+        except Exception as e:
+            logging.info(f"SSH connection to {self.host} failed its health check: {e}")
+            return False
+
+    def get_sftp(self):
+        """The cached SFTP session, reopened if its channel was closed"""
+        if self.sftp is None or self.sftp.get_channel().closed:
+            self.sftp = self.client.open_sftp()
+        return self.sftp
+
+    def home_dir(self):
+        """Remote home directory (the SFTP session starts there), looked up once"""
+        if self.home is None:
+            try:
+                self.home = self.get_sftp().normalize('.')
+            except Exception as e:
+                logging.warning(f"Could not resolve home directory on {self.host}: {e}")
+            if not self.home:
+                self.home = f"/home/{self.user}"
+        return self.home
+
+    def exec_command(self, command, **kwargs):
+        return self.client.exec_command(command, **kwargs)
+
+    def close(self):
+        if self.agent is not None:
+            self.agent.close()
+            self.agent = None
+        for resource in (self.sftp, self.client):
+            if resource is not None:
+                try:
+                    resource.close()
+                except Exception as e:
+                    logging.error(f"Error closing SSH connection to {self.host}: {e}")
+        self.sftp = None
+        self.client = None
+
+
+class SSHConnectionPool:
+    """Process wide pool of PooledConnection keyed by (host, user)"""
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        self.connections = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, host, user, password, known_hosts_path=None, policy=None):
+        """
+        Return a live connection to host, reusing the pooled one when it is healthy.
+
+        Args:
+            known_hosts_path, policy: host key handling, only used when a new
+                connection has to be made
+        Raises:
+            paramiko.SSHException / OSError when a new connection cannot be made
+        """
+        key = (host, user)
+        with self.lock:
+            conn = self.connections.get(key)
+            if conn is not None:
+                conn.in_use += 1  # Reserved while it is checked, so nothing closes it meanwhile
+
+        # Check outside the lock: an idle connection's check is a network round trip,
+        # and workers deploying to other hosts must not queue behind it
+        if conn is not None:
+            if conn.password == password and conn.healthy():
+                with self.lock:
+                    conn.last_used = time.monotonic()
+                return conn
+            self.discard(conn)  # Closed once any other holder is done with it too
+
+        # Connect outside the lock: the host key prompt can wait on the user
+        conn = PooledConnection(host, user, password)
+        try:
+            conn.connect(known_hosts_path, policy)
+        except Exception:
+            conn.close()
+            raise
+        conn.in_use = 1
+        with self.lock:
+            previous = self.connections.get(key)
+            self.connections[key] = conn
+        if previous is not None and previous.in_use == 0:
+            previous.close()
+        return conn
+
+    def release(self, conn):
+        """Hand a connection back for the next run"""
+        with self.lock:
+            conn.in_use = max(0, conn.in_use - 1)
+            conn.last_used = time.monotonic()
+            if self.connections.get((conn.host, conn.user)) is not conn and conn.in_use == 0:
+                conn.close()
+
+    def discard(self, conn):
+        """Drop a connection that failed; it is closed once no other thread still holds it"""
+        with self.lock:
+            if self.connections.get((conn.host, conn.user)) is conn:
+                del self.connections[(conn.host, conn.user)]
+            conn.in_use = max(0, conn.in_use - 1)
+            idle = conn.in_use == 0
+        if idle:
+            conn.close()
+
+    def interrupt(self, conn):
+        """
+        Drop and close a connection right away, even while it is held, so blocking
+        calls on it fail. Its holders still hand it back with discard() or release().
+        """
+        with self.lock:
+            if self.connections.get((conn.host, conn.user)) is conn:
+                del self.connections[(conn.host, conn.user)]
+        conn.close()
+
+    def close_all(self):
+        with self.lock:
+            connections = list(self.connections.values())
+            self.connections.clear()
+        for conn in connections:
+            conn.close()
@@ -0,0 +1,391 @@
+"""
+telemetry.py - Telemetry framing shared by generated programs and the desktop
+
+Generated programs print their live state either as text lines
+('__REPORT__' + JSON) or, with binary telemetry enabled, as frames:
+
+    RS  kind  length  body
+    \\x1e 'R'  6 hex   base64 of the struct-packed report
+
+The body is base64 so frames survive the PTY used for SSH runs (which rewrites
+newlines) and the MicroPython REPL. The length prefix lets FrameDecoder
+reassemble a frame split across any number of reads. Report body layout
+(little endian), written by CodeCompiler.write_frame_encoder():
+
+    flags u8 (bit 0 full snapshot, bit 1 seq present), seq u32
+    then per entry: section u8 (0 variable, 1 device), name length u8, name
+        variable: value tag u8 + value (see VALUE_* below)
+        device:   PIN i16, type u8, state u8, value f32
+"""
+from Imports import json, struct, binascii, logging, os, time, threading, queue, deque, Path, QThread, pyqtSignal
+
+FRAME_START = '\x1e'  # ASCII record separator, never printed by generated code otherwise
+FRAME_HEADER = 8  # RS + kind + 6 hex digits of body length
+REPORT_TAG = '__REPORT__'
+MAX_TEXT_BUFFER = 64 * 1024  # Unterminated text kept before it is flushed as a line
+SEGMENT_BYTES = 4 * 1024 * 1024  # Recorder starts a new segment file past this size
+MAX_SEGMENTS = 8  # Recorder keeps this many segment files, oldest deleted first
+RING_SIZE = 500  # Reports the recorder keeps in memory for the UI
+UI_REFRESH_INTERVAL = 0.05  # Seconds between coalesced UI updates (20 per second)
+IGNORED_LINES = ("MicroPython", 'Type "help()"')  # REPL banner lines printed by the Pico on reset
+
+VALUE_NONE, VALUE_FALSE, VALUE_TRUE, VALUE_INT, VALUE_FLOAT, VALUE_STR = range(6)
+DEVICE_TYPES = ('Output', 'Input', 'Button', 'PWM')
+DEVICE_STATES = (None, 'LOW', 'HIGH')
+
+
+HEADER = struct.Struct('<BI')
+INT_VALUE = struct.Struct('<i')
+FLOAT_VALUE = struct.Struct('<d')
+STR_SIZE = struct.Struct('<H')
+DEVICE_ENTRY = struct.Struct('<hBBf')
+
+
+def decode_report(body):
+    """Unpack a binary report body into the same dict shape as a JSON report"""
+    flags, seq = HEADER.unpack_from(body, 0)
+    variables = {}
+    devices = {}
+    report = {'full': bool(flags & 1), 'variables': variables, 'devices': devices}
+    if flags & 2:
+        report['seq'] = seq
+    pos = HEADER.size
+    end = len(body)
+    while pos < end:
+        section, length = body[pos], body[pos + 1]
+        name = body[pos + 2:pos + 2 + length].decode('utf-8', errors='replace')
+        pos += 2 + length
+        if section == 0:
+            tag = body[pos]
+            pos += 1
+            if tag == VALUE_INT:
+                value = INT_VALUE.unpack_from(body, pos)[0]
+                pos += 4
+            elif tag == VALUE_FLOAT:
+                value = FLOAT_VALUE.unpack_from(body, pos)[0]
+                pos += 8
+            elif tag == VALUE_STR:
+                size = STR_SIZE.unpack_from(body, pos)[0]
+                value = body[pos + 2:pos + 2 + size].decode('utf-8', errors='replace')
+                pos += 2 + size
+            else:
+                value = (None, False, True)[tag] if tag <= VALUE_TRUE else None
+            variables[name] = {'value': value}
+        else:
+            pin, dev_type, state, value = DEVICE_ENTRY.unpack_from(body, pos)
+            pos += DEVICE_ENTRY.size
+            devices[name] = {
+                'name': name,
+                'PIN': pin,
+                'type': DEVICE_TYPES[dev_type] if dev_type < len(DEVICE_TYPES) else '',
+                'state': DEVICE_STATES[state] if state < len(DEVICE_STATES) else None,
+                'value': round(value, 4),
+            }
+    return report
+
+
+class FrameDecoder:
+    """
+    Incremental splitter for program output.
+
+    feed() takes whatever a read returned and gives back complete items only:
+    ('text', line) for ordinary output and ('report', dict) for telemetry, in
+    stream order. Partial lines and frames stay buffered until the rest arrives,
+    so nothing is lost at read boundaries.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+
+    def reset(self):
+        self.buffer = ''
+
+    def feed(self, data):
+        self.buffer += data
+        items = []
+        buf = self.buffer
+        pos = 0
+        while pos < len(buf):
+            frame_at = buf.find(FRAME_START, pos)
+            line_end = buf.find('\n', pos)
+            if frame_at == -1 or (line_end != -1 and line_end < frame_at):
+                # Text comes first: hand it out a whole line at a time
+                if line_end == -1:
+                    if len(buf) - pos > MAX_TEXT_BUFFER:
+                        self.add_text(items, buf[pos:])
+                        pos = len(buf)
+                    break
+                self.add_text(items, buf[pos:line_end])
+                pos = line_end + 1
+                continue
+            if frame_at > pos:
+                self.add_text(items, buf[pos:frame_at])
+            header = buf[frame_at:frame_at + FRAME_HEADER]
+            if len(header) < FRAME_HEADER:
+                pos = frame_at
+                break
+            try:
+                length = int(header[2:], 16)
+            except ValueError:
+                # Stray separator in plain output: keep it as text
+                self.add_text(items, buf[frame_at:frame_at + 1])
+                pos = frame_at + 1
+                continue
+            body_end = frame_at + FRAME_HEADER + length
+            if body_end > len(buf):
+                pos = frame_at
+                break
+            self.add_frame(items, header[1], buf[frame_at + FRAME_HEADER:body_end])
+            pos = body_end
+        self.buffer = buf[pos:]
+        return items
+
+    def add_text(self, items, text):
+        text = text.strip()
+        if not text:
+            return
+        if REPORT_TAG in text:
+            before, _, payload = text.partition(REPORT_TAG)
+            if before.strip():
+                items.append(('text', before.strip()))
+            try:
+                data, _ = json.JSONDecoder().raw_decode(payload)
+                items.append(('report', data))
+            except json.JSONDecodeError as e:
+                logging.error(f"Malformed telemetry line: {e}")
+            return
+        items.append(('text', text))
+
+    def add_frame(self, items, kind, body):
+        try:
+            if kind == 'R':
+                items.append(('report', decode_report(binascii.a2b_base64(body))))
+            else:
+                logging.warning(f"Unknown telemetry frame kind: {kind!r}")
+        except (binascii.Error, struct.error, IndexError, ValueError) as e:
+            logging.error(f"Malformed telemetry frame: {e}")
+
+
+class TelemetryRecorder:
+    """
+    Keeps a history of reports without touching the disk on the caller's thread.
+
+    record() appends to an in-memory ring buffer (recent) and queues the report
+    for a daemon writer thread. The writer stores one compact JSON line per
+    report, {"t": unix time, "r": report} (plus "s": board when several boards
+    run), in numbered segment files under directory and rotates to a new file
+    once a segment passes segment_bytes, deleting the oldest so at most
+    max_segments files remain.
+    """
+
+    def __init__(self, directory, segment_bytes=SEGMENT_BYTES, max_segments=MAX_SEGMENTS, ring_size=RING_SIZE):
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.recent = deque(maxlen=ring_size)
+        self.queue = queue.Queue()
+        self.thread = None
+        self.file = None
+        self.segment_index = 0
+        self.segment_size = 0
+
+    def record(self, report, source=None):
+        """source names the board the report came from when several run at once"""
+        entry = (time.time(), report, source)
+        self.recent.append(entry[:2])
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.run, name="TelemetryRecorder", daemon=True)
+            self.thread.start()
+        self.queue.put(entry)
+
+    def recent_reports(self, count=None):
+        """Last reports as (timestamp, report) pairs, oldest first"""
+        entries = list(self.recent)
+        return entries[-count:] if count else entries
+
+    def close(self):
+        """Write out everything queued and stop the writer thread"""
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout=5)
+        self.thread = None
+
+    def run(self):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self.segment_index = max(self.segment_indexes(), default=-1) + 1
+            self.open_segment()
+            while True:
+                entries = [self.queue.get()]
+                # Write everything that piled up in one go, then flush once
+                while True:
+                    try:
+                        entries.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                for entry in entries:
+                    if entry is None:
+                        continue
+                    record = {'t': round(entry[0], 3), 'r': entry[1]}
+                    if entry[2] is not None:
+                        record['s'] = entry[2]
+                    line = json.dumps(record, separators=(',', ':'), ensure_ascii=False, default=str) + "\n"
+                    data = line.encode('utf-8')  # Segment sizes count bytes, not characters
+                    if self.segment_size and self.segment_size + len(data) > self.segment_bytes:
+                        self.file.close()
+                        self.segment_index += 1
+                        self.open_segment()
+                    self.file.write(data)
+                    self.segment_size += len(data)
+                self.file.flush()
+                if None in entries:
+                    break
+        except Exception as e:
+            logging.error(f"Telemetry recorder stopped: {e}")
+        finally:
+            if self.file:
+                self.file.close()
+                self.file = None
+
+    def segment_path(self, index):
+        return self.directory / f"telemetry_{index:06d}.jsonl"
+
+    def segment_indexes(self):
+        indexes = []
+        for entry in self.directory.glob("telemetry_*.jsonl"):
+            try:
+                indexes.append(int(entry.stem.split("_")[1]))
+            except (IndexError, ValueError):
+                continue
+        return indexes
+
+    def open_segment(self):
+        self.file = open(self.segment_path(self.segment_index), "ab")
+        self.segment_size = self.file.tell()
+        for index in sorted(self.segment_indexes())[:-self.max_segments]:
+            try:
+                os.remove(self.segment_path(index))
+            except OSError as e:
+                logging.warning(f"Could not remove old telemetry segment {index}: {e}")
+
+
+class TelemetrySource:
+    """Decoder and merged report state of one board"""
+
+    def __init__(self):
+        self.decoder = FrameDecoder()
+        self.state = {'variables': {}, 'devices': {}}
+        self.seq = -1
+
+
+class TelemetryIngestThread(QThread):
+    """
+    Turns raw program output into UI updates away from the GUI thread.
+
+    Reader threads call feed() (connect their output signal with a direct
+    connection), tagging the chunk with the board it came from when several
+    boards run at once. This thread decodes each board's output separately,
+    merges its reports, hands them to the recorder, and at most every interval
+    seconds emits one updated signal carrying only the values of the selected
+    board that changed since the last one. Many reports between two refreshes
+    therefore cost the UI one update. Report counts of every board go out on
+    activity at the same rate.
+    """
+    updated = pyqtSignal(object, object)  # ({'variables': {...}, 'devices': {...}} changed values, [text lines])
+    activity = pyqtSignal(object)  # {source: reports received since the previous emit}
+
+    RESET = object()  # Queue marker: a new program run starts
+    SELECT = object()  # Queue marker: show another board's values
+
+    def __init__(self, recorder=None, interval=UI_REFRESH_INTERVAL):
+        super().__init__()
+        self.recorder = recorder
+        self.interval = interval
+        self.chunks = queue.Queue()
+        self.sources = {}
+        self.selected = None  # Board whose values reach the UI; None is the single-board case
+        self.running = True
+
+    def feed(self, chunk, source=None):
+        """Queue output from any thread"""
+        self.chunks.put((source, chunk))
+
+    def reset(self, selected=None):
+        """Drop buffered output and state from the previous run"""
+        self.chunks.put((self.RESET, selected))
+
+    def select(self, source):
+        """Show source's values in the UI from now on"""
+        self.chunks.put((self.SELECT, source))
+
+    def stop(self):
+        self.running = False
+        self.chunks.put((None, None))
+
+    def merge(self, source, report):
+        """
+        Fold one report into the source's latest state and return its values.
+        Full reports (and reports from programs without delta telemetry) replace
+        the state; delta reports carry only changed keys and are merged on top.
+        """
+        variables = report.get('variables', {})
+        devices = report.get('devices', {})
+        if 'seq' not in report or report.get('full'):
+            source.state = {'variables': dict(variables), 'devices': dict(devices)}
+        else:
+            if report['seq'] != source.seq + 1:
+                logging.debug(f"Telemetry gap before report {report['seq']}, next snapshot resyncs")
+            source.state['variables'].update(variables)
+            source.state['devices'].update(devices)
+        source.seq = report.get('seq', -1)
+        return variables, devices
+
+    def run(self):
+        changed = {'variables': {}, 'devices': {}}
+        text_lines = []
+        counts = {}
+        next_emit = time.monotonic() + self.interval
+        while self.running:
+            try:
+                name, chunk = self.chunks.get(timeout=max(0.0, next_emit - time.monotonic()))
+            except queue.Empty:
+                name, chunk = None, None
+            if name is self.RESET:
+                self.sources = {}
+                self.selected = chunk
+                changed = {'variables': {}, 'devices': {}}
+                text_lines = []
+                counts = {}
+            elif name is self.SELECT:
+                self.selected = chunk
+                state = self.sources[chunk].state if chunk in self.sources else {'variables': {}, 'devices': {}}
+                changed = {'variables': dict(state['variables']), 'devices': dict(state['devices'])}
+            elif chunk:
+                source = self.sources.get(name)
+                if source is None:
+                    source = self.sources[name] = TelemetrySource()
+                for kind, item in source.decoder.feed(str(chunk)):
+                    if kind == 'text':
+                        if not item.startswith(IGNORED_LINES) and item != ">>>":
+                            text_lines.append(item if name is None else f"[{name}] {item}")
+                        continue
+                    try:
+                        variables, devices = self.merge(source, item)
+                        counts[name] = counts.get(name, 0) + 1
+                        if name == self.selected:
+                            changed['variables'].update(variables)
+                            changed['devices'].update(devices)
+                        if self.recorder:
+                            self.recorder.record(item, name)
+                    except Exception as e:
+                        logging.error(f"Error processing report: {e}")
+            now = time.monotonic()
+            if now >= next_emit:
+                if changed['variables'] or changed['devices'] or text_lines:
+                    self.updated.emit(changed, text_lines)
+                    changed = {'variables': {}, 'devices': {}}
+                    text_lines = []
+                if counts:
+                    self.activity.emit(counts)
+                    counts = {}
+                next_emit = max(next_emit + self.interval, now)